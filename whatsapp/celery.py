@@ -0,0 +1,16 @@
+"""
+Celery config for whatsapp project.
+
+Start a worker with the beat scheduler for the periodic tasks:
+    celery -A whatsapp worker -B -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'whatsapp.settings')
+
+app = Celery('whatsapp')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -75,7 +75,14 @@ DATABASES = {
         'PASSWORD': 'cp7kvt',
         'HOST': 'localhost',
         'PORT': '5432',
-        
+        # Keep connections open between websocket events instead of reconnecting
+        # for every query; health checks drop ones the server has closed
+        'CONN_MAX_AGE': 300,
+        'CONN_HEALTH_CHECKS': True,
+        # Behind pgbouncer (pool_mode = transaction), point HOST/PORT at pgbouncer
+        # (default port 6432) and disable server-side cursors, which do not
+        # survive transaction pooling:
+        # 'DISABLE_SERVER_SIDE_CURSORS': True,
     }
 }
 
@@ -143,6 +150,75 @@ CHANNEL_LAYERS = {
 }
 
 
+# Cache Configuration
+# Must be shared by every ASGI process and the Celery worker: presence, the
+# presence journal that flush_presence persists to last_seen, and the unread
+# counters are all written in one process and read in another.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
+}
+
+# The in-memory backend is per-process, so presence tracking refuses to run on it:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+#     }
+# }
+
+
+# Celery Configuration
+CELERY_BROKER_URL = 'redis://127.0.0.1:6379/0'
+CELERY_TIMEZONE = TIME_ZONE
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-presence': {
+        'task': 'whatsapp_app.tasks.flush_presence',
+        'schedule': 60.0,
+    },
+    'recount-unread': {
+        'task': 'whatsapp_app.tasks.recount_unread',
+        'schedule': 60 * 60.0,
+    },
+    'prune-statuses': {
+        'task': 'whatsapp_app.tasks.prune_statuses',
+        'schedule': 60 * 60.0,
+    },
+    'prune-notifications': {
+        'task': 'whatsapp_app.tasks.prune_notifications',
+        'schedule': 24 * 60 * 60.0,
+    },
+}
+
+
+# Logging
+# Records are queued and written by a background thread so websocket
+# consumers never block the event loop on log I/O
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '{asctime} {levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'background': {
+            'class': 'whatsapp_app.log.BackgroundStreamHandler',
+            'formatter': 'verbose',
+        },
+    },
+    'loggers': {
+        'whatsapp_app': {
+            'handlers': ['background'],
+            'level': 'INFO',
+        },
+    },
+}
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -1,23 +1,69 @@
+import hashlib
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
 from django.utils.html import format_html
+from django.db.models import Count, F
+from django.db.models.functions import Substr
 from .models import (
     User, Contact, Chat, ChatParticipant, Message, MessageReceipt,
     MessageReaction, Status, StatusView, Call, GroupCall, GroupCallParticipant,
-    BlockedUser, ArchivedChat, Notification, MediaGallery, DeletedMessage
+    BlockedUser, ArchivedChat, Notification, MediaGallery, DeletedMessage,
+    StarredMessage
 )
 
 
+class CachingPaginator(Paginator):
+    """Paginator that caches the row count of large admin changelists"""
+    COUNT_TIMEOUT = 60 * 60
+    
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+        
+        key = 'admin_count:' + hashlib.md5(str(query).encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.COUNT_TIMEOUT)
+        return count
+
+
+class HighVolumeAdmin(admin.ModelAdmin):
+    """Base admin for tables that grow with every message sent"""
+    paginator = CachingPaginator
+    show_full_result_count = False
+
+
+class MessagePreviewAdmin(HighVolumeAdmin):
+    """Base admin for rows that show a preview of their related message"""
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _preview=Substr('message__content', 1, 50),
+            _message_type=F('message__message_type'),
+        )
+    
+    def message_preview(self, obj):
+        return obj._preview or f"[{obj._message_type}]"
+    message_preview.short_description = 'Message'
+
+
 @admin.register(User)
 class UserAdmin(BaseUserAdmin):
     list_display = ['username', 'phone_number', 'email', 'is_online', 'last_seen', 'created_at']
-    list_filter = ['is_online', 'is_staff', 'is_active', 'created_at']
+    list_filter = ['is_staff', 'is_active']
     search_fields = ['username', 'phone_number', 'email', 'first_name', 'last_name']
     readonly_fields = ['last_seen', 'created_at', 'updated_at']
     
     fieldsets = BaseUserAdmin.fieldsets + (
         ('WhatsApp Profile', {
-            'fields': ('phone_number', 'profile_picture', 'about', 'is_online', 'last_seen')
+            'fields': ('phone_number', 'profile_picture', 'about', 'last_seen')
         }),
         ('Privacy Settings', {
             'fields': ('last_seen_privacy', 'profile_photo_privacy', 'about_privacy', 'status_privacy')
@@ -32,15 +78,21 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('phone_number', 'email', 'first_name', 'last_name')
         }),
     )
+    
+    def is_online(self, obj):
+        return obj.is_online
+    is_online.boolean = True
+    is_online.short_description = 'Online'
 
 
 @admin.register(Contact)
 class ContactAdmin(admin.ModelAdmin):
     list_display = ['user', 'contact_user', 'name', 'is_blocked', 'created_at']
-    list_filter = ['is_blocked', 'created_at']
+    list_filter = ['is_blocked']
     search_fields = ['user__username', 'contact_user__username', 'name']
     readonly_fields = ['created_at']
     autocomplete_fields = ['user', 'contact_user']
+    list_select_related = ['user', 'contact_user']
 
 
 class ChatParticipantInline(admin.TabularInline):
@@ -53,76 +105,97 @@ class ChatParticipantInline(admin.TabularInline):
 @admin.register(Chat)
 class ChatAdmin(admin.ModelAdmin):
     list_display = ['id', 'chat_type', 'name', 'created_by', 'participant_count', 'created_at']
-    list_filter = ['chat_type', 'created_at']
+    list_filter = ['chat_type']
     search_fields = ['name', 'description', 'created_by__username']
     readonly_fields = ['id', 'created_at', 'updated_at']
     autocomplete_fields = ['created_by']
     inlines = [ChatParticipantInline]
+    list_select_related = ['created_by']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _participant_count=Count('participants')
+        ).prefetch_related('participants')
     
     def participant_count(self, obj):
-        return obj.participants.count()
+        return obj._participant_count
     participant_count.short_description = 'Participants'
+    participant_count.admin_order_field = '_participant_count'
 
 
 @admin.register(ChatParticipant)
 class ChatParticipantAdmin(admin.ModelAdmin):
     list_display = ['user', 'chat', 'role', 'is_muted', 'is_pinned', 'is_archived', 'joined_at']
-    list_filter = ['role', 'is_muted', 'is_pinned', 'is_archived', 'joined_at']
+    list_filter = ['role', 'is_muted', 'is_pinned', 'is_archived']
     search_fields = ['user__username', 'chat__name']
     readonly_fields = ['joined_at']
     autocomplete_fields = ['user', 'chat', 'last_read_message']
+    list_select_related = ['user', 'chat']
+    
+    def get_queryset(self, request):
+        # Personal chats render their participants in Chat.__str__
+        return super().get_queryset(request).prefetch_related('chat__participants')
 
 
 @admin.register(Message)
-class MessageAdmin(admin.ModelAdmin):
-    list_display = ['id', 'sender', 'chat', 'message_type', 'content_preview', 'is_deleted', 'created_at']
-    list_filter = ['message_type', 'is_deleted', 'deleted_for_everyone', 'is_starred', 'created_at']
+class MessageAdmin(HighVolumeAdmin):
+    list_display = ['id', 'sender', 'chat', 'message_type', 'content_preview', 'deleted_for_everyone', 'created_at']
+    list_filter = ['message_type', 'deleted_for_everyone']
     search_fields = ['sender__username', 'content', 'chat__name']
     readonly_fields = ['id', 'created_at', 'edited_at']
     autocomplete_fields = ['sender', 'chat', 'reply_to', 'forwarded_from']
     date_hierarchy = 'created_at'
+    list_select_related = ['sender', 'chat']
+    
+    def get_queryset(self, request):
+        # One character past the cut-off tells us whether to add an ellipsis
+        queryset = super().get_queryset(request).annotate(
+            _preview=Substr('content', 1, 51)
+        ).prefetch_related('chat__participants')
+        # The changelist only shows the preview, so leave full bodies in the database
+        if request.resolver_match and request.resolver_match.url_name.endswith('_changelist'):
+            queryset = queryset.defer('content')
+        return queryset
     
     def content_preview(self, obj):
-        if obj.content:
-            return obj.content[:50] + '...' if len(obj.content) > 50 else obj.content
+        if obj._preview:
+            return obj._preview[:50] + '...' if len(obj._preview) > 50 else obj._preview
         return f"[{obj.message_type}]"
     content_preview.short_description = 'Content'
 
 
 @admin.register(MessageReceipt)
-class MessageReceiptAdmin(admin.ModelAdmin):
+class MessageReceiptAdmin(MessagePreviewAdmin):
     list_display = ['message_preview', 'user', 'status', 'delivered_at', 'read_at']
-    list_filter = ['status', 'delivered_at', 'read_at']
+    list_filter = ['status']
     search_fields = ['message__content', 'user__username']
     readonly_fields = ['delivered_at', 'read_at']
     autocomplete_fields = ['message', 'user']
-    
-    def message_preview(self, obj):
-        return str(obj.message)[:50]
-    message_preview.short_description = 'Message'
+    list_select_related = ['user']
 
 
 @admin.register(MessageReaction)
-class MessageReactionAdmin(admin.ModelAdmin):
+class MessageReactionAdmin(MessagePreviewAdmin):
     list_display = ['message_preview', 'user', 'emoji', 'created_at']
-    list_filter = ['emoji', 'created_at']
+    list_filter = ['emoji']
     search_fields = ['message__content', 'user__username']
     readonly_fields = ['created_at']
     autocomplete_fields = ['message', 'user']
-    
-    def message_preview(self, obj):
-        return str(obj.message)[:50]
-    message_preview.short_description = 'Message'
+    list_select_related = ['user']
 
 
 @admin.register(Status)
 class StatusAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'status_type', 'content_preview', 'privacy', 'view_count', 'created_at', 'expires_at']
-    list_filter = ['status_type', 'privacy', 'created_at']
+    list_filter = ['status_type', 'privacy']
     search_fields = ['user__username', 'content']
     readonly_fields = ['id', 'created_at']
     autocomplete_fields = ['user']
     date_hierarchy = 'created_at'
+    list_select_related = ['user']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_view_count=Count('views'))
     
     def content_preview(self, obj):
         if obj.content:
@@ -131,17 +204,18 @@ class StatusAdmin(admin.ModelAdmin):
     content_preview.short_description = 'Content'
     
     def view_count(self, obj):
-        return obj.views.count()
+        return obj._view_count
     view_count.short_description = 'Views'
+    view_count.admin_order_field = '_view_count'
 
 
 @admin.register(StatusView)
-class StatusViewAdmin(admin.ModelAdmin):
+class StatusViewAdmin(HighVolumeAdmin):
     list_display = ['status_owner', 'viewer', 'viewed_at']
-    list_filter = ['viewed_at']
     search_fields = ['status__user__username', 'viewer__username']
     readonly_fields = ['viewed_at']
     autocomplete_fields = ['status', 'viewer']
+    list_select_related = ['status__user', 'viewer']
     
     def status_owner(self, obj):
         return obj.status.user.username
@@ -149,13 +223,14 @@ class StatusViewAdmin(admin.ModelAdmin):
 
 
 @admin.register(Call)
-class CallAdmin(admin.ModelAdmin):
+class CallAdmin(HighVolumeAdmin):
     list_display = ['id', 'caller', 'receiver', 'call_type', 'status', 'duration_formatted', 'started_at']
-    list_filter = ['call_type', 'status', 'started_at']
+    list_filter = ['call_type', 'status']
     search_fields = ['caller__username', 'receiver__username']
     readonly_fields = ['id', 'started_at', 'answered_at', 'ended_at']
     autocomplete_fields = ['caller', 'receiver']
     date_hierarchy = 'started_at'
+    list_select_related = ['caller', 'receiver']
     
     def duration_formatted(self, obj):
         if obj.duration:
@@ -176,72 +251,92 @@ class GroupCallParticipantInline(admin.TabularInline):
 @admin.register(GroupCall)
 class GroupCallAdmin(admin.ModelAdmin):
     list_display = ['id', 'chat', 'call_type', 'initiated_by', 'participant_count', 'started_at', 'ended_at']
-    list_filter = ['call_type', 'started_at']
+    list_filter = ['call_type']
     search_fields = ['chat__name', 'initiated_by__username']
     readonly_fields = ['id', 'started_at', 'ended_at']
     autocomplete_fields = ['chat', 'initiated_by']
     inlines = [GroupCallParticipantInline]
+    list_select_related = ['chat', 'initiated_by']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            _participant_count=Count('participants')
+        )
     
     def participant_count(self, obj):
-        return obj.participants.count()
+        return obj._participant_count
     participant_count.short_description = 'Participants'
+    participant_count.admin_order_field = '_participant_count'
 
 
 @admin.register(GroupCallParticipant)
 class GroupCallParticipantAdmin(admin.ModelAdmin):
     list_display = ['user', 'group_call', 'joined_at', 'left_at']
-    list_filter = ['joined_at', 'left_at']
     search_fields = ['user__username', 'group_call__chat__name']
     readonly_fields = ['joined_at', 'left_at']
     autocomplete_fields = ['group_call', 'user']
+    list_select_related = ['group_call__chat', 'user']
 
 
 @admin.register(BlockedUser)
 class BlockedUserAdmin(admin.ModelAdmin):
     list_display = ['blocker', 'blocked', 'blocked_at']
-    list_filter = ['blocked_at']
     search_fields = ['blocker__username', 'blocked__username']
     readonly_fields = ['blocked_at']
     autocomplete_fields = ['blocker', 'blocked']
+    list_select_related = ['blocker', 'blocked']
 
 
 @admin.register(ArchivedChat)
 class ArchivedChatAdmin(admin.ModelAdmin):
     list_display = ['user', 'chat', 'archived_at']
-    list_filter = ['archived_at']
     search_fields = ['user__username', 'chat__name']
     readonly_fields = ['archived_at']
     autocomplete_fields = ['user', 'chat']
+    list_select_related = ['user', 'chat']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('chat__participants')
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(HighVolumeAdmin):
     list_display = ['user', 'notification_type', 'title', 'is_read', 'created_at']
-    list_filter = ['notification_type', 'is_read', 'created_at']
+    list_filter = ['notification_type', 'is_read']
     search_fields = ['user__username', 'title', 'body']
     readonly_fields = ['created_at']
     autocomplete_fields = ['user', 'related_chat', 'related_message']
     date_hierarchy = 'created_at'
+    list_select_related = ['user']
 
 
 @admin.register(MediaGallery)
-class MediaGalleryAdmin(admin.ModelAdmin):
+class MediaGalleryAdmin(HighVolumeAdmin):
     list_display = ['chat', 'media_type', 'uploaded_by', 'created_at']
-    list_filter = ['media_type', 'created_at']
+    list_filter = ['media_type']
     search_fields = ['chat__name', 'uploaded_by__username']
     readonly_fields = ['created_at']
     autocomplete_fields = ['chat', 'message', 'uploaded_by']
     date_hierarchy = 'created_at'
+    list_select_related = ['chat', 'uploaded_by']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('chat__participants')
 
 
 @admin.register(DeletedMessage)
-class DeletedMessageAdmin(admin.ModelAdmin):
+class DeletedMessageAdmin(MessagePreviewAdmin):
     list_display = ['message_preview', 'user', 'deleted_at']
-    list_filter = ['deleted_at']
     search_fields = ['message__content', 'user__username']
     readonly_fields = ['deleted_at']
     autocomplete_fields = ['message', 'user']
-    
-    def message_preview(self, obj):
-        return str(obj.message)[:50]
-    message_preview.short_description = 'Message'
\ No newline at end of file
+    list_select_related = ['user']
+
+
+@admin.register(StarredMessage)
+class StarredMessageAdmin(MessagePreviewAdmin):
+    list_display = ['message_preview', 'user', 'starred_at']
+    search_fields = ['message__content', 'user__username']
+    readonly_fields = ['starred_at']
+    autocomplete_fields = ['message', 'user']
+    list_select_related = ['user']
\ No newline at end of file
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WhatsappAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'whatsapp_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -3,23 +3,117 @@ WhatsApp Clone WebSocket Consumers
 Path: whatsapp_app/consumers.py
 """
 
-import json
+import asyncio
+import logging
+import uuid
+
+import orjson
+from datetime import timedelta
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.layers import get_channel_layer
 from channels.db import database_sync_to_async
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.db.models import Q
 from django.utils import timezone
+from . import presence
 from .models import (
     User, Chat, Message, MessageReceipt, ChatParticipant,
-    Call, Notification
+    Call, GroupCall, Notification
 )
 
+logger = logging.getLogger(__name__)
+
+MEMBERSHIP_CACHE_TIMEOUT = 300
+UNAUTHENTICATED_CLOSE_CODE = 4401
+TYPING_TIMEOUT = 5
+PRESENCE_REFRESH_INTERVAL = 30  # seconds between presence TTL refreshes per connection
+RECEIPT_FLUSH_DELAY = 0.1  # seconds of read receipts coalesced into one UPDATE
+
+
+def dumps(data):
+    """Encode a websocket frame (orjson returns bytes; browsers expect text frames)"""
+    return orjson.dumps(data).decode()
+
+
+def notification_group_name(user_id):
+    """Group joined by every NotificationConsumer socket (one per device) of a user"""
+    return f'user_{user_id}'
+
+
+def chat_group_name(chat_id):
+    """Group joined by every ChatConsumer socket open on a chat"""
+    return f'chat_{chat_id}'
+
+
+def message_frame(message):
+    """Serialized chat_message frame for a saved message (sender already loaded)"""
+    sender = message.sender
+    return dumps({
+        'type': 'chat_message',
+        'message': {
+            'id': str(message.id),
+            'sender_id': sender.id,
+            'sender_name': f"{sender.first_name} {sender.last_name}",
+            'content': message.content,
+            'message_type': message.message_type,
+            'created_at': message.created_at,
+            'reply_to': str(message.reply_to_id) if message.reply_to_id else None,
+        }
+    })
+
+
+async def notify_users(user_ids, notification):
+    """Push a notification to every connected device of the given users"""
+    channel_layer = get_channel_layer()
+    # Serialized once; each device's consumer forwards the frame as-is
+    event = {
+        'type': 'notification',
+        'payload': dumps({'type': 'notification', 'notification': notification}),
+    }
+    for user_id in set(user_ids):
+        await channel_layer.group_send(notification_group_name(user_id), event)
+
+
+async def broadcast_message(message, recipient_ids, payload=None, sender_channel_name=None):
+    """Fan a saved message out to the chat group and its recipients' devices
+
+    Everything needed travels in the events, so subscribers never go back to
+    the database to find out what was sent.
+    """
+    channel_layer = get_channel_layer()
+    await channel_layer.group_send(
+        chat_group_name(message.chat_id),
+        {
+            'type': 'chat_message',
+            'sender_channel_name': sender_channel_name,
+            'payload': payload or message_frame(message),
+        }
+    )
+    
+    # Same push for every recipient; the rows were written with the message
+    await notify_users(recipient_ids, {
+        'notification_type': 'message',
+        'title': f"New message from {message.sender.first_name}"[:100],
+        'body': message.content[:50] if message.content else f"[{message.message_type}]",
+        'chat_id': str(message.chat_id),
+        'message_id': str(message.id),
+    })
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
     """WebSocket consumer for real-time messaging"""
     
     async def connect(self):
         self.chat_id = self.scope['url_route']['kwargs']['chat_id']
-        self.chat_group_name = f'chat_{self.chat_id}'
+        self.chat_group_name = chat_group_name(self.chat_id)
         self.user = self.scope['user']
+        self.in_chat = False
+        
+        if not self.user.is_authenticated:
+            await self.close(code=UNAUTHENTICATED_CLOSE_CODE)
+            return
         
         # Check if user is participant
         is_participant = await self.check_participant()
@@ -28,16 +122,23 @@ class ChatConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
+        self._display_name = f"{self.user.first_name} {self.user.last_name}"
+        self.typing_key = f'typing:{self.chat_id}:{self.user.id}'
+        self._pending_receipts = set()
+        self._receipt_flush = None
+        
         # Join chat group
         await self.channel_layer.group_add(
             self.chat_group_name,
             self.channel_name
         )
+        self.in_chat = True
         
         await self.accept()
         
         # Update user online status
         await self.update_online_status(True)
+        self._presence_refreshed_at = asyncio.get_running_loop().time()
         
         # Notify others user is online
         await self.channel_layer.group_send(
@@ -50,6 +151,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
     
     async def disconnect(self, close_code):
+        if not self.in_chat:
+            return
+        
+        # Write out receipts still waiting for the next flush
+        if self._receipt_flush is not None:
+            self._receipt_flush.cancel()
+            await self.flush_receipts()
+        
         # Leave chat group
         await self.channel_layer.group_discard(
             self.chat_group_name,
@@ -59,6 +168,11 @@ class ChatConsumer(AsyncWebsocketConsumer):
         # Update user online status
         await self.update_online_status(False)
         
+        # Clear a typing indicator left on by a dropped connection
+        if await cache.aget(self.typing_key, False):
+            await cache.adelete(self.typing_key)
+            await self.broadcast_typing(False)
+        
         # Notify others user is offline
         await self.channel_layer.group_send(
             self.chat_group_name,
@@ -70,9 +184,15 @@ class ChatConsumer(AsyncWebsocketConsumer):
         )
     
     async def receive(self, text_data):
-        data = json.loads(text_data)
+        data = orjson.loads(text_data)
         message_type = data.get('type')
         
+        # Every frame, including the idle 'heartbeat', keeps the user online
+        now = asyncio.get_running_loop().time()
+        if now - self._presence_refreshed_at > PRESENCE_REFRESH_INTERVAL:
+            self._presence_refreshed_at = now
+            await sync_to_async(presence.refresh)(self.user.id)
+        
         if message_type == 'chat_message':
             await self.handle_chat_message(data)
         elif message_type == 'typing':
@@ -88,54 +208,91 @@ class ChatConsumer(AsyncWebsocketConsumer):
         reply_to_id = data.get('reply_to')
         
         # Save message to database
-        message = await self.save_message(content, reply_to_id)
+        message, recipient_ids = await self.save_message(content, reply_to_id)
         
         if message:
-            # Send message to chat group
-            await self.channel_layer.group_send(
-                self.chat_group_name,
-                {
-                    'type': 'chat_message',
-                    'message': {
-                        'id': str(message.id),
-                        'sender_id': self.user.id,
-                        'sender_name': f"{self.user.first_name} {self.user.last_name}",
-                        'content': message.content,
-                        'message_type': message.message_type,
-                        'created_at': message.created_at.isoformat(),
-                        'reply_to': str(reply_to_id) if reply_to_id else None,
-                    }
-                }
+            # Serialize once; every subscriber forwards the same frame
+            payload = message_frame(message)
+            
+            # The sender's own socket is answered directly, not via the group
+            await self.send(text_data=payload)
+            
+            await broadcast_message(
+                message, recipient_ids, payload=payload, sender_channel_name=self.channel_name
             )
     
     async def handle_typing(self, data):
         """Handle typing indicator"""
-        is_typing = data.get('is_typing', False)
+        is_typing = bool(data.get('is_typing', False))
+        
+        # Clients report every keystroke; only broadcast idle <-> typing transitions.
+        # The TTL expires a "typing" state the client never turned off.
+        was_typing = await cache.aget(self.typing_key, False)
+        if is_typing:
+            await cache.aset(self.typing_key, True, TYPING_TIMEOUT)
+        else:
+            await cache.adelete(self.typing_key)
         
-        # Send typing status to group
+        if was_typing != is_typing:
+            await self.broadcast_typing(is_typing)
+    
+    async def broadcast_typing(self, is_typing):
+        """Send typing status to group"""
         await self.channel_layer.group_send(
             self.chat_group_name,
             {
                 'type': 'typing_indicator',
                 'user_id': self.user.id,
-                'user_name': f"{self.user.first_name} {self.user.last_name}",
-                'is_typing': is_typing,
+                'payload': dumps({
+                    'type': 'typing_indicator',
+                    'user_id': self.user.id,
+                    'user_name': self._display_name,
+                    'is_typing': is_typing,
+                }),
             }
         )
     
     async def handle_read_receipt(self, data):
         """Handle read receipt"""
-        message_id = data.get('message_id')
+        try:
+            message_id = uuid.UUID(str(data.get('message_id')))
+        except ValueError:
+            return
+        
+        # Clients mark a screenful of messages read at once; buffer them briefly
+        # so they share one UPDATE and one group_send
+        self._pending_receipts.add(message_id)
+        if self._receipt_flush is None:
+            self._receipt_flush = asyncio.create_task(self.flush_receipts_later())
+    
+    async def flush_receipts_later(self):
+        await asyncio.sleep(RECEIPT_FLUSH_DELAY)
+        try:
+            await self.flush_receipts()
+        except DatabaseError:
+            # Nobody awaits this task, so log instead of losing the traceback
+            logger.exception('flush_receipts failed for chat=%s', self.chat_id)
+    
+    async def flush_receipts(self):
+        """Mark buffered receipts read and notify the group"""
+        message_ids = list(self._pending_receipts)
+        self._pending_receipts.clear()
+        self._receipt_flush = None
+        if not message_ids:
+            return
         
-        # Update receipt in database
-        await self.update_receipt(message_id, 'read')
+        # Update receipts in database
+        updated_ids = await self.update_receipts(message_ids, 'read')
+        await sync_to_async(ChatParticipant.mark_read)(self.chat_id, self.user.id)
+        if not updated_ids:
+            return
         
         # Notify sender
         await self.channel_layer.group_send(
             self.chat_group_name,
             {
-                'type': 'read_receipt',
-                'message_id': message_id,
+                'type': 'read_receipt_batch',
+                'message_ids': updated_ids,
                 'user_id': self.user.id,
             }
         )
@@ -160,25 +317,19 @@ class ChatConsumer(AsyncWebsocketConsumer):
     # WebSocket event handlers
     async def chat_message(self, event):
         """Send chat message to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'chat_message',
-            'message': event['message']
-        }))
+        # The sending socket already has its copy
+        if event['sender_channel_name'] != self.channel_name:
+            await self.send(text_data=event['payload'])
     
     async def typing_indicator(self, event):
         """Send typing indicator to WebSocket"""
         # Don't send own typing indicator back
         if event['user_id'] != self.user.id:
-            await self.send(text_data=json.dumps({
-                'type': 'typing_indicator',
-                'user_id': event['user_id'],
-                'user_name': event['user_name'],
-                'is_typing': event['is_typing'],
-            }))
+            await self.send(text_data=event['payload'])
     
     async def user_status(self, event):
         """Send user online status to WebSocket"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps({
             'type': 'user_status',
             'user_id': event['user_id'],
             'is_online': event['is_online'],
@@ -186,105 +337,127 @@ class ChatConsumer(AsyncWebsocketConsumer):
     
     async def read_receipt(self, event):
         """Send read receipt to WebSocket"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps({
             'type': 'read_receipt',
             'message_id': event['message_id'],
             'user_id': event['user_id'],
         }))
     
+    async def read_receipt_batch(self, event):
+        """Send a batch of read receipts to WebSocket"""
+        await self.send(text_data=dumps({
+            'type': 'read_receipt_batch',
+            'message_ids': event['message_ids'],
+            'user_id': event['user_id'],
+        }))
+    
     async def message_deleted(self, event):
         """Send message deletion notification"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps({
             'type': 'message_deleted',
             'message_id': event['message_id'],
             'delete_for_everyone': event['delete_for_everyone'],
         }))
     
     # Database operations
-    @database_sync_to_async
-    def check_participant(self):
+    async def check_participant(self):
         """Check if user is a participant of the chat"""
-        try:
-            chat = Chat.objects.get(id=self.chat_id)
-            return chat.participants.filter(id=self.user.id).exists()
-        except Chat.DoesNotExist:
-            return False
+        key = ChatParticipant.membership_cache_key(self.chat_id, self.user.id)
+        if await cache.aget(key):
+            return True
+        
+        # Only memberships are cached: a later bulk-created participant would
+        # not fire the signal that clears a cached "not a member" answer.
+        is_participant = await ChatParticipant.objects.filter(
+            chat_id=self.chat_id,
+            user_id=self.user.id
+        ).aexists()
+        if is_participant:
+            await cache.aset(key, True, MEMBERSHIP_CACHE_TIMEOUT)
+        return is_participant
     
     @database_sync_to_async
     def save_message(self, content, reply_to_id=None):
-        """Save message to database"""
+        """Save message to database (sync: the async ORM has no transactions)"""
         try:
             chat = Chat.objects.get(id=self.chat_id)
-            
-            message_data = {
-                'chat': chat,
-                'sender': self.user,
-                'content': content,
-                'message_type': 'text',
-            }
-            
-            if reply_to_id:
+        except Chat.DoesNotExist:
+            return None, []
+        
+        message_data = {
+            'chat': chat,
+            'sender': self.user,
+            'content': content,
+            'message_type': 'text',
+        }
+        
+        # Client-supplied, so a reply is dropped unless it names a message in this chat
+        if reply_to_id:
+            try:
+                reply_to_id = uuid.UUID(str(reply_to_id))
+            except ValueError:
+                reply_to_id = None
+            if reply_to_id and Message.objects.filter(id=reply_to_id, chat_id=self.chat_id).exists():
                 message_data['reply_to_id'] = reply_to_id
-            
-            message = Message.objects.create(**message_data)
-            
-            # Create receipts for other participants
-            other_participants = chat.participants.exclude(id=self.user.id)
-            for participant in other_participants:
-                MessageReceipt.objects.create(
-                    message=message,
-                    user=participant,
-                    status='sent'
-                )
-            
-            return message
-        except Exception as e:
-            print(f"Error saving message: {e}")
-            return None
-    
-    @database_sync_to_async
-    def update_receipt(self, message_id, status):
-        """Update message receipt status"""
+        
+        # Only the ids are needed for the receipts, so skip hydrating users
+        participant_ids = [
+            user_id for user_id in ChatParticipant.participant_ids(chat.id)
+            if user_id != self.user.id
+        ]
+        
+        # Groups keep receipts on the message itself rather than a row per member
+        if chat.chat_type == 'group':
+            message_data['delivery'] = Message.initial_delivery(participant_ids)
+        
         try:
-            receipt = MessageReceipt.objects.get(
-                message_id=message_id,
-                user=self.user
-            )
-            receipt.status = status
-            if status == 'read':
-                receipt.read_at = timezone.now()
-            elif status == 'delivered':
-                receipt.delivered_at = timezone.now()
-            receipt.save()
-            return True
-        except MessageReceipt.DoesNotExist:
-            return False
+            with transaction.atomic():
+                message = Message.objects.create(**message_data)
+                
+                # Create receipts for other participants in a single INSERT
+                if chat.chat_type != 'group':
+                    MessageReceipt.objects.bulk_create(
+                        [
+                            MessageReceipt(message=message, user_id=participant_id, status='sent')
+                            for participant_id in participant_ids
+                        ],
+                        batch_size=500,
+                        ignore_conflicts=True,
+                    )
+                
+                ChatParticipant.record_message(message)
+                Notification.fanout_message(message, participant_ids)
+        except DatabaseError:
+            logger.exception('save_message failed for chat=%s', self.chat_id)
+            raise
+        
+        return message, participant_ids
     
     @database_sync_to_async
-    def delete_message(self, message_id, delete_for_everyone):
+    def update_receipts(self, message_ids, status):
+        """Update message receipt status; returns the ids of this chat's messages that changed"""
+        messages = Message.objects.filter(chat_id=self.chat_id, id__in=message_ids)
+        with transaction.atomic():
+            updated_ids = [str(message_id) for message_id in MessageReceipt.pending(messages, self.user.id, status)]
+            if updated_ids:
+                MessageReceipt.mark(messages.filter(id__in=updated_ids), self.user.id, status)
+        return updated_ids
+    
+    async def delete_message(self, message_id, delete_for_everyone):
         """Delete a message"""
-        try:
-            message = Message.objects.get(id=message_id, sender=self.user)
-            
-            if delete_for_everyone:
-                # Check if within 1 hour
-                from datetime import timedelta
-                if timezone.now() - message.created_at > timedelta(hours=1):
-                    return False
-                
-                message.deleted_for_everyone = True
-                message.content = "This message was deleted"
-                message.save()
-            
-            return True
-        except Message.DoesNotExist:
-            return False
+        messages = Message.objects.filter(id=message_id, sender=self.user)
+        if not delete_for_everyone:
+            return await messages.aexists()
+        
+        # Only within 1 hour; the WHERE clause enforces it in the same statement
+        updated = await messages.filter(
+            created_at__gt=timezone.now() - timedelta(hours=1)
+        ).aupdate(deleted_for_everyone=True, content="This message was deleted")
+        return bool(updated)
     
-    @database_sync_to_async
-    def update_online_status(self, is_online):
-        """Update user online status"""
-        self.user.is_online = is_online
-        self.user.save(update_fields=['is_online', 'last_seen'])
+    async def update_online_status(self, is_online):
+        """Update user online status (persisted by the flush_presence task)"""
+        await sync_to_async(presence.set_online)(self.user.id, is_online)
 
 
 class CallConsumer(AsyncWebsocketConsumer):
@@ -294,16 +467,30 @@ class CallConsumer(AsyncWebsocketConsumer):
         self.call_id = self.scope['url_route']['kwargs']['call_id']
         self.call_group_name = f'call_{self.call_id}'
         self.user = self.scope['user']
+        self.in_call = False
+        
+        if not self.user.is_authenticated:
+            await self.close(code=UNAUTHENTICATED_CLOSE_CODE)
+            return
+        
+        # Only the call's parties may receive its signaling traffic
+        if not await self.check_call_participant():
+            await self.close()
+            return
         
         # Join call group
         await self.channel_layer.group_add(
             self.call_group_name,
             self.channel_name
         )
+        self.in_call = True
         
         await self.accept()
     
     async def disconnect(self, close_code):
+        if not self.in_call:
+            return
+        
         # Leave call group
         await self.channel_layer.group_discard(
             self.call_group_name,
@@ -320,7 +507,7 @@ class CallConsumer(AsyncWebsocketConsumer):
         )
     
     async def receive(self, text_data):
-        data = json.loads(text_data)
+        data = orjson.loads(text_data)
         signal_type = data.get('type')
         
         # Forward WebRTC signaling messages
@@ -339,7 +526,7 @@ class CallConsumer(AsyncWebsocketConsumer):
         """Forward WebRTC signaling to client"""
         # Don't send signal back to sender
         if event['user_id'] != self.user.id:
-            await self.send(text_data=json.dumps({
+            await self.send(text_data=dumps({
                 'type': event['signal_type'],
                 'user_id': event['user_id'],
                 'data': event['data'],
@@ -347,10 +534,20 @@ class CallConsumer(AsyncWebsocketConsumer):
     
     async def user_left(self, event):
         """Notify that a user left the call"""
-        await self.send(text_data=json.dumps({
+        await self.send(text_data=dumps({
             'type': 'user_left',
             'user_id': event['user_id'],
         }))
+    
+    async def check_call_participant(self):
+        """Check if user is the caller/receiver of the call, or in the group call's chat"""
+        if await Call.objects.filter(
+            Q(caller=self.user) | Q(receiver=self.user), id=self.call_id
+        ).aexists():
+            return True
+        return await GroupCall.objects.filter(
+            id=self.call_id, chat__participants=self.user
+        ).aexists()
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
@@ -358,7 +555,12 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     
     async def connect(self):
         self.user = self.scope['user']
-        self.user_group_name = f'user_{self.user.id}'
+        self.user_group_name = notification_group_name(self.user.id)
+        
+        # Anonymous users would all share the user_None group
+        if not self.user.is_authenticated:
+            await self.close(code=UNAUTHENTICATED_CLOSE_CODE)
+            return
         
         # Join user's personal notification group
         await self.channel_layer.group_add(
@@ -381,7 +583,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
     
     async def notification(self, event):
         """Send notification to client"""
-        await self.send(text_data=json.dumps({
+        if 'payload' in event:
+            await self.send(text_data=event['payload'])
+            return
+        await self.send(text_data=dumps({
             'type': 'notification',
             'notification': event['notification'],
         }))
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+WhatsApp Clone Logging Handlers
+Path: whatsapp_app/log.py
+
+Referenced from settings.LOGGING. Consumers log from the event loop, so the
+actual stream I/O is handed to a background listener thread.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class BackgroundStreamHandler(QueueHandler):
+    """Queue records and write them to stderr from a listener thread"""
+
+    def __init__(self):
+        super().__init__(queue.SimpleQueue())
+        self.listener = QueueListener(self.queue, logging.StreamHandler())
+        self.listener.start()
+        atexit.register(self.listener.stop)
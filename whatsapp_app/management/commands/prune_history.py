@@ -0,0 +1,33 @@
+"""
+Django Management Command to prune old notifications and messages
+Path: whatsapp_app/management/commands/prune_history.py
+Run: python manage.py prune_history [--days 90] [--message-days 365]
+"""
+
+from django.core.management.base import BaseCommand
+
+from whatsapp_app.tasks import NOTIFICATION_RETENTION_DAYS, prune_messages, prune_notifications
+
+
+class Command(BaseCommand):
+    help = 'Deletes old notifications, and optionally old messages, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=NOTIFICATION_RETENTION_DAYS,
+            help='Delete notifications older than this many days',
+        )
+        parser.add_argument(
+            '--message-days',
+            type=int,
+            default=None,
+            help='Also delete messages older than this many days (off by default)',
+        )
+
+    def handle(self, *args, **options):
+        summary = [f"✓ Deleted {prune_notifications(options['days'])} notifications"]
+        if options['message_days'] is not None:
+            summary.append(f"✓ Deleted {prune_messages(options['message_days'])} messages")
+        self.stdout.write(self.style.SUCCESS('\n'.join(summary)))
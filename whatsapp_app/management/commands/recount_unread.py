@@ -0,0 +1,17 @@
+"""
+Django Management Command to rebuild the denormalized unread counters
+Path: whatsapp_app/management/commands/recount_unread.py
+Run: python manage.py recount_unread
+"""
+
+from django.core.management.base import BaseCommand
+
+from whatsapp_app.models import ChatParticipant
+
+
+class Command(BaseCommand):
+    help = 'Recomputes ChatParticipant.unread_count from receipts and delivery masks'
+
+    def handle(self, *args, **options):
+        corrected = ChatParticipant.recount_unread()
+        self.stdout.write(self.style.SUCCESS(f'✓ Corrected {corrected} unread counters'))
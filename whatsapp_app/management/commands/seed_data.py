@@ -5,20 +5,50 @@ Run: python manage.py seed_data
 """
 
 from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import JSONField
 from django.utils import timezone
 from django.core.files import File
+from django.core.files.storage import default_storage
 from django.contrib.auth.hashers import make_password
+from collections import Counter, defaultdict
 from datetime import timedelta
+from io import StringIO
+from itertools import accumulate
+import json
 import random
 import os
+import shutil
 from pathlib import Path
 
 from whatsapp_app.models import (
     User, Contact, Chat, ChatParticipant, Message, MessageReceipt,
     MessageReaction, Status, StatusView, Call, GroupCall, GroupCallParticipant,
-    BlockedUser, ArchivedChat, Notification, MediaGallery, DeletedMessage
+    BlockedUser, ArchivedChat, Notification, MediaGallery, DeletedMessage,
+    StarredMessage
 )
 
+# Weighted draws use cumulative weights built once, and are made k at a time
+MESSAGE_TYPES = ['text', 'image', 'video', 'audio', 'document', 'voice', 'location']
+MESSAGE_TYPE_CUM_WEIGHTS = list(accumulate([70, 10, 5, 5, 5, 3, 2]))
+RECEIPT_STATUSES = ['sent', 'delivered', 'read']
+RECEIPT_STATUS_CUM_WEIGHTS = list(accumulate([5, 15, 80]))
+STATUS_TYPES = ['text', 'image', 'video']
+STATUS_TYPE_CUM_WEIGHTS = list(accumulate([40, 50, 10]))
+CALL_STATUSES = ['ended', 'missed', 'declined']
+CALL_STATUS_CUM_WEIGHTS = list(accumulate([70, 20, 10]))
+
+
+def sample_excluding(population, k, excluded):
+    """random.sample of k items other than `excluded`, without copying the population"""
+    # Draw one spare: drop `excluded` if it came up, otherwise the spare
+    picks = random.sample(population, k + 1)
+    if excluded in picks:
+        picks.remove(excluded)
+        return picks
+    return picks[:k]
+
 
 class Command(BaseCommand):
     help = 'Seeds the database with realistic Kenyan WhatsApp data'
@@ -29,98 +59,180 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before seeding',
         )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=0,
+            help='Number of extra Faker-generated users on top of the Kenyan seed users',
+        )
 
     def handle(self, *args, **options):
         if options['clear']:
             self.stdout.write(self.style.WARNING('Clearing existing data...'))
-            self.clear_data()
+            with transaction.atomic():
+                self.clear_data()
 
         self.stdout.write(self.style.SUCCESS('Starting data seeding...'))
+        self.extra_users = options['users']
         
         # Media path
         self.media_path = Path(r'D:\static\admin\Backup')
+        self.index_media_files()
+        
+        # One commit for the whole run instead of one per INSERT
+        with transaction.atomic():
+            counts = self.seed()
+        
+        # Single styled write for the whole summary
+        summary = '\n'.join(f'✓ Created {count} {label}' for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(summary + '\n\n🎉 Database seeding completed successfully!'))
+
+    def seed(self):
+        """Create all seed data and return the row count per label"""
+        counts = {}
         
         # Create data
         users = self.create_users()
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(users)} users'))
+        counts['users'] = len(users)
         
         contacts = self.create_contacts(users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(contacts)} contacts'))
+        counts['contacts'] = len(contacts)
         
         chats = self.create_chats(users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(chats)} chats'))
+        counts['chats'] = len(chats)
         
         messages = self.create_messages(chats, users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(messages)} messages'))
+        counts['messages'] = len(messages)
         
         receipts = self.create_message_receipts(messages, chats)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(receipts)} message receipts'))
+        counts['message receipts'] = len(receipts)
+        self.update_chat_list_fields(messages, receipts)
         
         reactions = self.create_reactions(messages, users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(reactions)} reactions'))
+        counts['reactions'] = len(reactions)
+        
+        starred = self.create_starred_messages(messages)
+        counts['starred messages'] = len(starred)
+        
+        deleted = self.create_deleted_messages(messages)
+        counts['deleted messages'] = len(deleted)
         
         statuses = self.create_statuses(users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(statuses)} statuses'))
+        counts['statuses'] = len(statuses)
         
         status_views = self.create_status_views(statuses, users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(status_views)} status views'))
+        counts['status views'] = len(status_views)
         
         calls = self.create_calls(users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(calls)} calls'))
+        counts['calls'] = len(calls)
         
         group_calls = self.create_group_calls(chats, users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(group_calls)} group calls'))
+        counts['group calls'] = len(group_calls)
         
         blocked = self.create_blocked_users(users)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(blocked)} blocked users'))
+        counts['blocked users'] = len(blocked)
         
         notifications = self.create_notifications(users, chats, messages)
-        self.stdout.write(self.style.SUCCESS(f'✓ Created {len(notifications)} notifications'))
+        counts['notifications'] = len(notifications)
         
-        self.stdout.write(self.style.SUCCESS('\n🎉 Database seeding completed successfully!'))
+        return counts
 
     def clear_data(self):
         """Clear all data from tables"""
-        DeletedMessage.objects.all().delete()
-        MediaGallery.objects.all().delete()
-        Notification.objects.all().delete()
-        ArchivedChat.objects.all().delete()
-        BlockedUser.objects.all().delete()
-        GroupCallParticipant.objects.all().delete()
-        GroupCall.objects.all().delete()
-        Call.objects.all().delete()
-        StatusView.objects.all().delete()
-        Status.objects.all().delete()
-        MessageReaction.objects.all().delete()
-        MessageReceipt.objects.all().delete()
-        Message.objects.all().delete()
-        ChatParticipant.objects.all().delete()
-        Chat.objects.all().delete()
-        Contact.objects.all().delete()
+        models = [
+            StarredMessage, DeletedMessage, MediaGallery, Notification, ArchivedChat, BlockedUser,
+            GroupCallParticipant, GroupCall, Call, StatusView, Status,
+            MessageReaction, MessageReceipt, Message, ChatParticipant, Chat, Contact,
+        ]
+        # Same statements as `manage.py flush`: one TRUNCATE ... RESTART IDENTITY CASCADE
+        # on Postgres, instead of the ORM collecting and deleting row by row
+        sql_list = connection.ops.sql_flush(
+            no_style(),
+            [model._meta.db_table for model in models],
+            reset_sequences=True,
+            allow_cascade=True,
+        )
+        connection.ops.execute_sql_flush(sql_list)
+        
+        # Superusers must survive, so users still go through the ORM
         User.objects.filter(is_superuser=False).delete()
 
-    def get_random_file(self, extension=None):
-        """Get random file from media path"""
+    def index_media_files(self):
+        """Walk the media path once and bucket its files by extension"""
+        self.media_files = []
+        self.media_files_by_ext = defaultdict(list)
         if not self.media_path.exists():
-            return None
+            return
         
-        files = list(self.media_path.glob('**/*'))
+        for path in self.media_path.rglob('*'):
+            if path.is_file():
+                self.media_files.append(path)
+                self.media_files_by_ext[path.suffix.lower()].append(path)
+
+    def get_random_file(self, extension=None):
+        """Get random file from media path"""
         if extension:
-            files = [f for f in files if f.suffix.lower() == extension.lower()]
+            files = self.media_files_by_ext.get(extension.lower())
+        else:
+            files = self.media_files
         
         if not files:
             return None
         
         return random.choice(files)
     
+    def copy_insert(self, model, objs):
+        """Insert objs with Postgres COPY (bulk_create elsewhere); auto ids are not read back"""
+        if connection.vendor != 'postgresql':
+            return model.objects.bulk_create(objs, batch_size=1000)
+        
+        fields = [
+            f for f in model._meta.concrete_fields
+            if not (f.primary_key and f.remote_field is None and f.get_internal_type().endswith('AutoField'))
+        ]
+        
+        # CSV: unquoted empty is NULL, so quote every non-NULL value
+        buf = StringIO()
+        for obj in objs:
+            values = []
+            for field in fields:
+                # pre_save fills auto_now_add, same as bulk_create
+                value = field.pre_save(obj, True)
+                if isinstance(field, JSONField):
+                    # COPY takes the JSON text, not the SQL-quoted adapter
+                    value = None if value is None else json.dumps(value, cls=field.encoder)
+                else:
+                    value = field.get_db_prep_save(value, connection)
+                values.append('' if value is None else '"' + str(value).replace('"', '""') + '"')
+            buf.write(','.join(values) + '\n')
+            obj._state.adding = False
+            obj._state.db = connection.alias
+        buf.seek(0)
+        
+        columns = ', '.join(connection.ops.quote_name(f.column) for f in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN WITH CSV',
+                buf,
+            )
+        return objs
+    
     def attach_file_to_message(self, message, file_path):
-        """Properly attach a file to a message"""
+        """Link/copy a file into media storage and point the unsaved message at it"""
         if file_path and file_path.exists():
             try:
-                with open(file_path, 'rb') as f:
-                    file_content = f.read()
-                    from django.core.files.base import ContentFile
-                    message.media_file.save(file_path.name, ContentFile(file_content), save=True)
+                name = default_storage.get_available_name(
+                    message.media_file.field.generate_filename(message, file_path.name)
+                )
+                dest = default_storage.path(name)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                try:
+                    # Hard link when on the same filesystem, no bytes copied
+                    os.link(file_path, dest)
+                except OSError:
+                    shutil.copyfile(file_path, dest)
+                # Row is written later with the rest of the batch, so no save()
+                message.media_file.name = name
                 return True
             except Exception as e:
                 self.stdout.write(self.style.WARNING(f'Could not attach file {file_path}: {e}'))
@@ -169,20 +281,28 @@ class Command(BaseCommand):
             "hustling in Mombasa",
         ]
         
+        # Every seeded user shares a password; hashing is deliberately slow, so do it once
+        password = make_password('password123')
+        
+        if self.extra_users:
+            kenyan_names = kenyan_names + self.generate_names(self.extra_users, {n[2] for n in kenyan_names})
+        
+        # Distinct subscriber numbers in one draw, since phone_number is unique
+        subscriber_numbers = random.sample(range(10000000, 100000000), len(kenyan_names))
+        
         users = []
-        for i, (first_name, last_name, username) in enumerate(kenyan_names):
+        for (first_name, last_name, username), number in zip(kenyan_names, subscriber_numbers):
             # Kenyan phone number format
-            phone = f"+254{random.choice([7, 1])}{random.randint(10000000, 99999999)}"
+            phone = f"+254{random.choice([7, 1])}{number}"
             
-            user = User.objects.create(
+            user = User(
                 username=username,
                 first_name=first_name,
                 last_name=last_name,
                 email=f"{username}@example.com",
                 phone_number=phone,
-                password=make_password('password123'),
+                password=password,
                 about=random.choice(about_texts),
-                is_online=random.choice([True, False]),
                 last_seen=timezone.now() - timedelta(minutes=random.randint(1, 1440)),
                 last_seen_privacy=random.choice(['everyone', 'contacts', 'nobody']),
                 profile_photo_privacy=random.choice(['everyone', 'contacts', 'nobody']),
@@ -191,51 +311,71 @@ class Command(BaseCommand):
             )
             users.append(user)
         
-        return users
+        return User.objects.bulk_create(users, batch_size=1000)
+
+    def generate_names(self, count, taken):
+        """Generate (first_name, last_name, username) tuples with unique usernames"""
+        from faker import Faker
+        fake = Faker('en_KE')
+        
+        names = []
+        while len(names) < count:
+            username = fake.unique.user_name()
+            if username in taken:
+                continue
+            names.append((fake.first_name(), fake.last_name(), username))
+        return names
 
     def create_contacts(self, users):
         """Create contacts between users"""
         contacts = []
         for user in users:
             # Each user has 5-15 contacts
-            contact_users = random.sample([u for u in users if u != user], random.randint(5, min(15, len(users)-1)))
+            contact_users = sample_excluding(users, random.randint(5, min(15, len(users)-1)), user)
             for contact_user in contact_users:
-                contact = Contact.objects.create(
+                contact = Contact(
                     user=user,
                     contact_user=contact_user,
                     name=f"{contact_user.first_name} {contact_user.last_name}",
-                    is_blocked=random.choice([False] * 95 + [True] * 5)  # 5% blocked
+                    is_blocked=random.random() < 0.05  # 5% blocked
                 )
                 contacts.append(contact)
         
-        return contacts
+        return self.copy_insert(Contact, contacts)
 
     def create_chats(self, users):
         """Create personal and group chats"""
         chats = []
+        participants = []
         
-        # Personal chats (one-to-one)
+        # Personal chats (one-to-one), at most one per pair
+        personal_keys = set()
         for i in range(30):
             user1, user2 = random.sample(users, 2)
-            chat = Chat.objects.create(
+            personal_key = Chat.personal_key_for(user1.id, user2.id)
+            if personal_key in personal_keys:
+                continue
+            personal_keys.add(personal_key)
+            chat = Chat(
                 chat_type='personal',
-                created_by=user1
+                created_by=user1,
+                personal_key=personal_key,
             )
             
-            ChatParticipant.objects.create(
+            participants.append(ChatParticipant(
                 chat=chat,
                 user=user1,
                 role='member',
-                is_pinned=random.choice([False] * 8 + [True] * 2),
-                is_muted=random.choice([False] * 9 + [True] * 1),
-            )
+                is_pinned=random.random() < 0.2,
+                is_muted=random.random() < 0.1,
+            ))
             
-            ChatParticipant.objects.create(
+            participants.append(ChatParticipant(
                 chat=chat,
                 user=user2,
                 role='member',
-                is_pinned=random.choice([False] * 8 + [True] * 2),
-            )
+                is_pinned=random.random() < 0.2,
+            ))
             
             chats.append(chat)
         
@@ -260,7 +400,7 @@ class Command(BaseCommand):
         
         for group_name in group_names[:10]:  # Create 10 groups
             admin = random.choice(users)
-            chat = Chat.objects.create(
+            chat = Chat(
                 chat_type='group',
                 name=group_name,
                 description=f"Welcome to {group_name}! Stay connected.",
@@ -268,25 +408,34 @@ class Command(BaseCommand):
             )
             
             # Admin
-            ChatParticipant.objects.create(
+            participants.append(ChatParticipant(
                 chat=chat,
                 user=admin,
                 role='admin'
-            )
+            ))
             
             # Members (5-15 members)
-            members = random.sample([u for u in users if u != admin], random.randint(5, 15))
+            members = sample_excluding(users, random.randint(5, 15), admin)
             for member in members:
-                ChatParticipant.objects.create(
+                participants.append(ChatParticipant(
                     chat=chat,
                     user=member,
                     role='member',
-                    is_pinned=random.choice([False] * 9 + [True] * 1),
-                    is_muted=random.choice([False] * 7 + [True] * 3),
-                )
+                    is_pinned=random.random() < 0.1,
+                    is_muted=random.random() < 0.3,
+                ))
             
             chats.append(chat)
         
+        # Chat ids are UUIDs assigned in Python, so participants can reference them before insert
+        self.copy_insert(Chat, chats)
+        self.copy_insert(ChatParticipant, participants)
+        
+        # Participant users per chat, so later phases don't query chat.participants
+        self.chat_users = defaultdict(list)
+        for participant in participants:
+            self.chat_users[participant.chat_id].append(participant.user)
+        
         return chats
 
     def create_messages(self, chats, users):
@@ -325,29 +474,27 @@ class Command(BaseCommand):
         ]
         
         messages = []
+        gallery_entries = []
+        attachments = []
         
         for chat in chats:
-            participants = list(chat.participants.all())
+            participants = self.chat_users[chat.id]
             if not participants:
                 continue
             
             # Create 10-50 messages per chat
             num_messages = random.randint(10, 50)
+            chat_messages = []
+            senders = random.choices(participants, k=num_messages)
+            message_types = random.choices(MESSAGE_TYPES, cum_weights=MESSAGE_TYPE_CUM_WEIGHTS, k=num_messages)
             
-            for i in range(num_messages):
-                sender = random.choice(participants)
-                message_type = random.choices(
-                    ['text', 'image', 'video', 'audio', 'document', 'voice', 'location'],
-                    weights=[70, 10, 5, 5, 5, 3, 2]
-                )[0]
-                
+            for sender, message_type in zip(senders, message_types):
+                media_source = None
                 message_data = {
                     'chat': chat,
                     'sender': sender,
                     'message_type': message_type,
                     'created_at': timezone.now() - timedelta(days=random.randint(0, 30), hours=random.randint(0, 23)),
-                    'is_deleted': random.choice([False] * 95 + [True] * 5),
-                    'is_starred': random.choice([False] * 9 + [True] * 1),
                 }
                 
                 if message_type == 'text':
@@ -359,7 +506,7 @@ class Command(BaseCommand):
                     message_data['content'] = "📍 My Location"
                 elif message_type == 'image':
                     message_data['content'] = "📷 Photo"
-                    image_file = self.get_random_file('.jpg')
+                    media_source = self.get_random_file('.jpg')
                     # Skip if no file found
                 elif message_type == 'video':
                     message_data['content'] = "🎥 Video"
@@ -376,40 +523,67 @@ class Command(BaseCommand):
                     message_data['content'] = "🎤 Voice message"
                     message_data['media_duration'] = random.randint(1, 60)
                 
-                # Reply to previous message sometimes
-                if messages and random.random() < 0.15:  # 15% chance
-                    previous_messages = [m for m in messages if m.chat == chat]
-                    if previous_messages:
-                        message_data['reply_to'] = random.choice(previous_messages)
+                # Group receipts live on the message, so draw them before the COPY
+                if chat.chat_type == 'group':
+                    message_data['delivery'] = self.group_delivery(sender, participants)
+                
+                # Reply to previous message in this chat sometimes
+                if chat_messages and random.random() < 0.15:  # 15% chance
+                    message_data['reply_to'] = random.choice(chat_messages)
                 
-                message = Message.objects.create(**message_data)
+                message = Message(**message_data)
                 messages.append(message)
+                chat_messages.append(message)
+                if media_source:
+                    attachments.append((message, media_source))
                 
-                # Create media gallery entry for media messages
+                # Media gallery entry for media messages
                 if message_type in ['image', 'video', 'document']:
-                    MediaGallery.objects.create(
+                    gallery_entries.append(MediaGallery(
                         chat=chat,
                         message=message,
-                        media_type=message_type,
+                        media_type=MediaGallery.MediaType[message_type.upper()],
                         uploaded_by=sender
-                    )
+                    ))
+        
+        # Files are placed before the messages are written, so no per-file UPDATE
+        for message, file_path in attachments:
+            self.attach_file_to_message(message, file_path)
+        
+        # One COPY per table; replies and gallery rows point at Python-side UUIDs
+        self.copy_insert(Message, messages)
+        self.copy_insert(MediaGallery, gallery_entries)
         
         return messages
 
+    def group_delivery(self, sender, participants):
+        """Delivery mask for a group message, drawn like the 1:1 receipts"""
+        now = timezone.now()
+        recipients = [u for u in participants if u.id != sender.id]
+        statuses = random.choices(RECEIPT_STATUSES, cum_weights=RECEIPT_STATUS_CUM_WEIGHTS, k=len(recipients))
+        
+        delivery = {}
+        for recipient, status in zip(recipients, statuses):
+            stamps = {'s': now.isoformat()}
+            if status in ['delivered', 'read']:
+                delivered_at = now + timedelta(seconds=random.randint(1, 60))
+                stamps['d'] = delivered_at.isoformat()
+            if status == 'read':
+                stamps['r'] = (delivered_at + timedelta(seconds=random.randint(1, 300))).isoformat()
+            delivery[str(recipient.id)] = stamps
+        return delivery
+
     def create_message_receipts(self, messages, chats):
-        """Create message receipts"""
+        """Create message receipts for chats that are not groups"""
         receipts = []
         
         for message in messages:
-            chat = message.chat
-            participants = chat.participants.exclude(id=message.sender.id)
+            if message.delivery:
+                continue
+            participants = [u for u in self.chat_users[message.chat_id] if u.id != message.sender_id]
+            statuses = random.choices(RECEIPT_STATUSES, cum_weights=RECEIPT_STATUS_CUM_WEIGHTS, k=len(participants))
             
-            for participant in participants:
-                status = random.choices(
-                    ['sent', 'delivered', 'read'],
-                    weights=[5, 15, 80]
-                )[0]
-                
+            for participant, status in zip(participants, statuses):
                 receipt_data = {
                     'message': message,
                     'user': participant,
@@ -422,10 +596,37 @@ class Command(BaseCommand):
                 if status == 'read':
                     receipt_data['read_at'] = receipt_data['delivered_at'] + timedelta(seconds=random.randint(1, 300))
                 
-                receipt = MessageReceipt.objects.create(**receipt_data)
-                receipts.append(receipt)
+                receipts.append(MessageReceipt(**receipt_data))
         
-        return receipts
+        return self.copy_insert(MessageReceipt, receipts)
+
+    def update_chat_list_fields(self, messages, receipts):
+        """Fill the denormalized ChatParticipant fields that record_message keeps up to date"""
+        latest = {}
+        for message in messages:
+            if message.chat_id not in latest or message.created_at > latest[message.chat_id].created_at:
+                latest[message.chat_id] = message
+        unread = Counter(
+            (receipt.message.chat_id, receipt.user_id)
+            for receipt in receipts if receipt.status != 'read'
+        )
+        for message in messages:
+            for user_id, stamps in message.delivery.items():
+                if 'r' not in stamps:
+                    unread[message.chat_id, int(user_id)] += 1
+        
+        participants = list(ChatParticipant.objects.filter(chat_id__in=latest).only('chat_id', 'user_id'))
+        for participant in participants:
+            message = latest[participant.chat_id]
+            participant.last_message_preview = ChatParticipant.message_preview(message)
+            participant.last_message_at = message.created_at
+            participant.unread_count = unread[participant.chat_id, participant.user_id]
+        
+        ChatParticipant.objects.bulk_update(
+            participants,
+            ['last_message_preview', 'last_message_at', 'unread_count'],
+            batch_size=500,
+        )
 
     def create_reactions(self, messages, users):
         """Create message reactions"""
@@ -435,17 +636,33 @@ class Command(BaseCommand):
         for message in random.sample(messages, min(len(messages) // 3, 100)):
             # 1-3 reactions per message
             num_reactions = random.randint(1, 3)
-            reactors = random.sample(list(message.chat.participants.all()), min(num_reactions, message.chat.participants.count()))
+            pool = self.chat_users[message.chat_id]
+            reactors = random.sample(pool, min(num_reactions, len(pool)))
             
             for reactor in reactors:
-                reaction = MessageReaction.objects.create(
+                reactions.append(MessageReaction(
                     message=message,
                     user=reactor,
                     emoji=random.choice(emojis)
-                )
-                reactions.append(reaction)
+                ))
         
-        return reactions
+        return self.copy_insert(MessageReaction, reactions)
+
+    def create_starred_messages(self, messages):
+        """Star about 10% of messages for one member of the chat"""
+        starred = [
+            StarredMessage(user=random.choice(self.chat_users[message.chat_id]), message=message)
+            for message in messages if random.random() < 0.1
+        ]
+        return self.copy_insert(StarredMessage, starred)
+
+    def create_deleted_messages(self, messages):
+        """Delete about 5% of messages for their sender only"""
+        deleted = [
+            DeletedMessage(user_id=message.sender_id, message=message)
+            for message in messages if random.random() < 0.05
+        ]
+        return self.copy_insert(DeletedMessage, deleted)
 
     def create_statuses(self, users):
         """Create status updates"""
@@ -467,14 +684,15 @@ class Command(BaseCommand):
         
         for user in random.sample(users, min(len(users) // 2, 10)):
             # 1-3 statuses per user
-            for _ in range(random.randint(1, 3)):
-                status_type = random.choices(['text', 'image', 'video'], weights=[40, 50, 10])[0]
-                
+            status_types = random.choices(STATUS_TYPES, cum_weights=STATUS_TYPE_CUM_WEIGHTS, k=random.randint(1, 3))
+            for status_type in status_types:
                 status_data = {
                     'user': user,
                     'status_type': status_type,
                     'privacy': random.choice(['everyone', 'contacts']),
                     'created_at': timezone.now() - timedelta(hours=random.randint(1, 23)),
+                    # Bulk inserts skip Status.save(), which normally fills this in
+                    'expires_at': timezone.now() + timedelta(hours=24),
                 }
                 
                 if status_type == 'text':
@@ -482,10 +700,9 @@ class Command(BaseCommand):
                     status_data['background_color'] = random.choice(colors)
                     status_data['font'] = random.choice(['Arial', 'Helvetica', 'Sans-serif'])
                 
-                status = Status.objects.create(**status_data)
-                statuses.append(status)
+                statuses.append(Status(**status_data))
         
-        return statuses
+        return self.copy_insert(Status, statuses)
 
     def create_status_views(self, statuses, users):
         """Create status views"""
@@ -493,29 +710,24 @@ class Command(BaseCommand):
         
         for status in statuses:
             # 3-10 viewers per status
-            viewers = random.sample([u for u in users if u != status.user], random.randint(3, min(10, len(users)-1)))
+            viewers = sample_excluding(users, random.randint(3, min(10, len(users)-1)), status.user)
             
             for viewer in viewers:
-                view = StatusView.objects.create(
+                views.append(StatusView(
                     status=status,
                     viewer=viewer,
                     viewed_at=status.created_at + timedelta(minutes=random.randint(1, 300))
-                )
-                views.append(view)
+                ))
         
-        return views
+        return self.copy_insert(StatusView, views)
 
     def create_calls(self, users):
         """Create call records"""
         calls = []
         
-        for _ in range(50):
+        for status in random.choices(CALL_STATUSES, cum_weights=CALL_STATUS_CUM_WEIGHTS, k=50):
             caller, receiver = random.sample(users, 2)
             call_type = random.choice(['voice', 'video'])
-            status = random.choices(
-                ['ended', 'missed', 'declined'],
-                weights=[70, 20, 10]
-            )[0]
             
             call_data = {
                 'caller': caller,
@@ -530,20 +742,21 @@ class Command(BaseCommand):
                 call_data['duration'] = random.randint(30, 3600)
                 call_data['ended_at'] = call_data['answered_at'] + timedelta(seconds=call_data['duration'])
             
-            call = Call.objects.create(**call_data)
-            calls.append(call)
+            calls.append(Call(**call_data))
         
-        return calls
+        return self.copy_insert(Call, calls)
 
     def create_group_calls(self, chats, users):
         """Create group calls"""
         group_calls = []
+        call_participants = []
         group_chats = [c for c in chats if c.chat_type == 'group']
         
         for chat in random.sample(group_chats, min(len(group_chats), 5)):
-            initiator = random.choice(list(chat.participants.all()))
+            chat_users = self.chat_users[chat.id]
+            initiator = random.choice(chat_users)
             
-            group_call = GroupCall.objects.create(
+            group_call = GroupCall(
                 chat=chat,
                 call_type=random.choice(['voice', 'video']),
                 initiated_by=initiator,
@@ -552,40 +765,43 @@ class Command(BaseCommand):
             )
             
             # 3-8 participants
-            participants = random.sample(list(chat.participants.all()), random.randint(3, min(8, chat.participants.count())))
+            participants = random.sample(chat_users, random.randint(3, min(8, len(chat_users))))
             
             for participant in participants:
-                GroupCallParticipant.objects.create(
+                call_participants.append(GroupCallParticipant(
                     group_call=group_call,
                     user=participant,
                     joined_at=group_call.started_at + timedelta(seconds=random.randint(0, 30)),
                     left_at=group_call.ended_at - timedelta(seconds=random.randint(0, 60)) if random.random() < 0.8 else None
-                )
+                ))
             
             group_calls.append(group_call)
         
+        self.copy_insert(GroupCall, group_calls)
+        self.copy_insert(GroupCallParticipant, call_participants)
+        
         return group_calls
 
     def create_blocked_users(self, users):
         """Create blocked users"""
-        blocked = []
-        
-        for _ in range(10):
+        # Distinct (blocker, blocked) pairs, so the unique constraint is never hit
+        pairs = set()
+        while len(pairs) < 10:
             blocker, blocked_user = random.sample(users, 2)
-            try:
-                block = BlockedUser.objects.create(
-                    blocker=blocker,
-                    blocked=blocked_user
-                )
-                blocked.append(block)
-            except:
-                pass  # Skip if already exists
+            pairs.add((blocker, blocked_user))
+        
+        blocked = [
+            BlockedUser(blocker=blocker, blocked=blocked_user)
+            for blocker, blocked_user in pairs
+        ]
         
-        return blocked
+        # Pairs left over from an earlier run without --clear are skipped
+        return BlockedUser.objects.bulk_create(blocked, batch_size=1000, ignore_conflicts=True)
 
     def create_notifications(self, users, chats, messages):
         """Create notifications"""
         notifications = []
+        group_chats = [c for c in chats if c.chat_type == 'group']
         
         for user in random.sample(users, min(len(users), 10)):
             for _ in range(random.randint(3, 10)):
@@ -594,7 +810,7 @@ class Command(BaseCommand):
                 notif_data = {
                     'user': user,
                     'notification_type': notif_type,
-                    'is_read': random.choice([True, False]),
+                    'is_read': random.random() < 0.5,
                     'created_at': timezone.now() - timedelta(hours=random.randint(1, 48))
                 }
                 
@@ -602,14 +818,14 @@ class Command(BaseCommand):
                     message = random.choice(messages)
                     notif_data['title'] = f"New message from {message.sender.first_name}"
                     notif_data['body'] = message.content[:50] if message.content else f"[{message.message_type}]"
-                    notif_data['related_chat'] = message.chat
-                    notif_data['related_message'] = message
+                    notif_data['related_chat_id'] = message.chat_id
+                    notif_data['related_message_id'] = message.id
                 elif notif_type == 'call':
                     caller = random.choice(users)
                     notif_data['title'] = f"Missed call from {caller.first_name}"
                     notif_data['body'] = f"{caller.first_name} {caller.last_name} tried to call you"
                 elif notif_type == 'group_add':
-                    chat = random.choice([c for c in chats if c.chat_type == 'group'])
+                    chat = random.choice(group_chats)
                     notif_data['title'] = f"Added to {chat.name}"
                     notif_data['body'] = f"You were added to {chat.name}"
                     notif_data['related_chat'] = chat
@@ -618,7 +834,6 @@ class Command(BaseCommand):
                     notif_data['title'] = f"{poster.first_name} posted a status"
                     notif_data['body'] = "View their latest status update"
                 
-                notification = Notification.objects.create(**notif_data)
-                notifications.append(notification)
+                notifications.append(Notification(**notif_data))
         
-        return notifications
\ No newline at end of file
+        return self.copy_insert(Notification, notifications)
\ No newline at end of file
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['chat', '-created_at'], name='msg_chat_created_idx'),
+        ),
+    ]
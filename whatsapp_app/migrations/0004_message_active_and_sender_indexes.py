@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0003_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('deleted_for_everyone', False)), fields=['chat', '-created_at'], name='msg_chat_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['sender', '-created_at'], name='msg_sender_created_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:36
+
+import django.contrib.postgres.indexes
+import whatsapp_app.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0004_message_active_and_sender_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='id',
+            field=models.UUIDField(default=whatsapp_app.models.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='msg_created_brin', pages_per_range=32),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created_at'], name='notif_created_brin', pages_per_range=32),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:38
+
+from django.db import migrations, models
+
+
+# Existing chats would otherwise sort as if they had never had a message
+BACKFILL_LAST_MESSAGE = """
+    UPDATE whatsapp_app_chatparticipant cp
+    SET last_message_at = latest.created_at,
+        last_message_preview = LEFT(COALESCE(NULLIF(latest.content, ''), '[' || latest.message_type || ']'), 120)
+    FROM (
+        SELECT DISTINCT ON (chat_id) chat_id, created_at, content, message_type
+        FROM whatsapp_app_message
+        ORDER BY chat_id, created_at DESC
+    ) latest
+    WHERE latest.chat_id = cp.chat_id
+"""
+
+# Same count ChatParticipant.recount_unread keeps in line; every chat still has receipt rows here
+BACKFILL_UNREAD_COUNT = """
+    UPDATE whatsapp_app_chatparticipant cp
+    SET unread_count = counts.unread
+    FROM (
+        SELECT m.chat_id, r.user_id, COUNT(*) AS unread
+        FROM whatsapp_app_messagereceipt r
+        JOIN whatsapp_app_message m ON m.id = r.message_id
+        WHERE r.status <> 'read'
+        GROUP BY m.chat_id, r.user_id
+    ) counts
+    WHERE counts.chat_id = cp.chat_id AND counts.user_id = cp.user_id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0005_brin_created_and_uuid7_message_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='last_message_preview',
+            field=models.CharField(blank=True, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='chatparticipant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunSQL(BACKFILL_LAST_MESSAGE, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_UNREAD_COUNT, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='chatparticipant',
+            index=models.Index(fields=['user', '-last_message_at'], name='participant_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0006_chat_participant_chat_list_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='delivery',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0007_message_delivery_mask'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='chatparticipant',
+            name='participant_recent_idx',
+        ),
+        migrations.AlterField(
+            model_name='blockeduser',
+            name='blocked',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='blocked_by', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='statusview',
+            name='viewer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='blockeduser',
+            index=models.Index(fields=['blocked'], include=('blocker',), name='blk_blocked_cover'),
+        ),
+        migrations.AddIndex(
+            model_name='chatparticipant',
+            index=models.Index(fields=['user', 'is_archived', '-is_pinned', '-last_message_at'], include=('chat',), name='cp_user_pinned_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['user', 'name'], include=('contact_user', 'is_blocked'), name='contact_user_cover'),
+        ),
+        migrations.AddIndex(
+            model_name='statusview',
+            index=models.Index(fields=['viewer'], include=('status',), name='sv_viewer_cover'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:42
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0008_covering_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='is_online',
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='last_seen',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
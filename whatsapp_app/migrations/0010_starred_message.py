@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_message_flags(apps, schema_editor):
+    # The old star flag was global; attribute it to the sender. is_deleted is
+    # dropped without a copy: nothing ever read it, so those messages stayed visible
+    Message = apps.get_model('whatsapp_app', 'Message')
+    StarredMessage = apps.get_model('whatsapp_app', 'StarredMessage')
+    StarredMessage.objects.bulk_create(
+        [StarredMessage(message_id=m.id, user_id=m.sender_id) for m in Message.objects.filter(is_starred=True).only('sender_id')],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0009_presence_in_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StarredMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starred_at', models.DateTimeField(auto_now_add=True)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='starred_by_users', to='whatsapp_app.message')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='starred_messages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-starred_at'], name='starred_user_recent_idx')],
+                'unique_together': {('user', 'message')},
+            },
+        ),
+        migrations.RunPython(copy_message_flags, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_deleted',
+        ),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_starred',
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:46
+
+from django.db import migrations, models
+
+
+def backfill_personal_keys(apps, schema_editor):
+    # Oldest chat wins when a pair already has duplicates; the rest stay unkeyed
+    Chat = apps.get_model('whatsapp_app', 'Chat')
+    ChatParticipant = apps.get_model('whatsapp_app', 'ChatParticipant')
+    members = {}
+    for chat_id, user_id in ChatParticipant.objects.filter(chat__chat_type='personal').values_list('chat_id', 'user_id'):
+        members.setdefault(chat_id, []).append(user_id)
+    
+    seen = set()
+    chats = []
+    for chat in Chat.objects.filter(id__in=members).order_by('created_at').only('id'):
+        user_ids = members[chat.id]
+        if len(user_ids) != 2:
+            continue
+        key = f"{min(user_ids)}:{max(user_ids)}"
+        if key not in seen:
+            seen.add(key)
+            chat.personal_key = key
+            chats.append(chat)
+    Chat.objects.bulk_update(chats, ['personal_key'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0010_starred_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chat',
+            name='personal_key',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(backfill_personal_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='chat',
+            constraint=models.UniqueConstraint(condition=models.Q(('chat_type', 'personal')), fields=('personal_key',), name='uniq_personal_chat'),
+        ),
+        migrations.AddConstraint(
+            model_name='chat',
+            constraint=models.CheckConstraint(check=models.Q(('chat_type', 'personal'), ('personal_key__isnull', True), _connector='OR'), name='personal_key_only_personal'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0011_chat_personal_key'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_unread_idx'),
+        ),
+    ]
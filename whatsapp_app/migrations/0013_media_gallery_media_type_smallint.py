@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0012_notification_unread_index'),
+    ]
+
+    # One in-place rewrite (USING) instead of a copy column plus a Python loop
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        ALTER TABLE whatsapp_app_mediagallery
+                            ALTER COLUMN media_type TYPE smallint USING (
+                                CASE media_type WHEN 'image' THEN 1 WHEN 'video' THEN 2 ELSE 3 END
+                            ),
+                            ADD CONSTRAINT whatsapp_app_mediagallery_media_type_check CHECK (media_type >= 0);
+                    """,
+                    reverse_sql="""
+                        ALTER TABLE whatsapp_app_mediagallery
+                            DROP CONSTRAINT whatsapp_app_mediagallery_media_type_check,
+                            ALTER COLUMN media_type TYPE varchar(10) USING (
+                                CASE media_type WHEN 1 THEN 'image' WHEN 2 THEN 'video' ELSE 'document' END
+                            );
+                    """,
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='mediagallery',
+                    name='media_type',
+                    field=models.PositiveSmallIntegerField(choices=[(1, 'Image'), (2, 'Video'), (3, 'Document')]),
+                ),
+            ],
+        ),
+    ]
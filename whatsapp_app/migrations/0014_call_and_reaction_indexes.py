@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0013_media_gallery_media_type_smallint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='call',
+            name='caller',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_calls', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='call',
+            name='receiver',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='incoming_calls', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='messagereaction',
+            name='message',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to='whatsapp_app.message'),
+        ),
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(fields=['caller', '-started_at'], name='call_caller_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='call',
+            index=models.Index(fields=['receiver', '-started_at'], name='call_receiver_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='messagereaction',
+            index=models.Index(fields=['message'], include=('user', 'emoji'), name='reaction_message_cover'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0014_call_and_reaction_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('latitude__isnull', False)), fields=['latitude', 'longitude'], name='msg_location_idx'),
+        ),
+    ]
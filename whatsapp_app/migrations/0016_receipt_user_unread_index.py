@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-14 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0015_message_location_float'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='messagereceipt',
+            index=models.Index(condition=models.Q(('status__in', ['sent', 'delivered'])), fields=['user', 'message'], name='receipt_user_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-14 17:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('whatsapp_app', '0017_user_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='status',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='statuses', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=models.Index(fields=['user', 'expires_at'], name='status_user_expires_idx'),
+        ),
+    ]
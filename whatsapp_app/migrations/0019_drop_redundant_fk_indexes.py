@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-14 17:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('whatsapp_app', '0018_status_user_expires_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chatparticipant',
+            name='chat',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='whatsapp_app.chat'),
+        ),
+        migrations.AlterField(
+            model_name='chatparticipant',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='contact_user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='contacted_by', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='contact',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='contacts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='messagereceipt',
+            name='message',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='whatsapp_app.message'),
+        ),
+        AddIndexConcurrently(
+            model_name='contact',
+            index=models.Index(fields=['contact_user'], include=('user',), name='contact_reverse_cover'),
+        ),
+    ]
@@ -1,17 +1,31 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.functions import Upper
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.indexes import BrinIndex, GinIndex, OpClass
+from django.core.cache import cache
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
+import json
+import os
+import time
 import uuid
 
 
+def uuid7():
+    """Time-ordered UUID (RFC 9562 version 7) so new rows append to the PK index"""
+    value = time.time_ns() // 1_000_000 << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
 class User(AbstractUser):
     """Extended User model for WhatsApp clone"""
     phone_number = models.CharField(max_length=20, unique=True)
     profile_picture = models.ImageField(upload_to='profiles/', null=True, blank=True)
     about = models.CharField(max_length=139, default="Hey there! I am using WhatsApp")
-    is_online = models.BooleanField(default=False)
-    last_seen = models.DateTimeField(auto_now=True)
+    # Online status lives in the presence cache; last_seen is flushed from there in bulk
+    last_seen = models.DateTimeField(default=timezone.now)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -26,14 +40,32 @@ class User(AbstractUser):
     about_privacy = models.CharField(max_length=10, choices=PRIVACY_CHOICES, default='everyone')
     status_privacy = models.CharField(max_length=10, choices=PRIVACY_CHOICES, default='contacts')
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Admin autocomplete/search: icontains compiles to UPPER(col) LIKE UPPER('%q%')
+            GinIndex(OpClass(Upper('username'), name='gin_trgm_ops'), name='user_username_trgm'),
+            GinIndex(OpClass(Upper('phone_number'), name='gin_trgm_ops'), name='user_phone_trgm'),
+            # Contact search also matches on names
+            GinIndex(OpClass(Upper('first_name'), name='gin_trgm_ops'), name='user_first_name_trgm'),
+            GinIndex(OpClass(Upper('last_name'), name='gin_trgm_ops'), name='user_last_name_trgm'),
+        ]
+    
     def __str__(self):
         return f"{self.username} ({self.phone_number})"
+    
+    @property
+    def is_online(self):
+        """Live online flag from the presence cache, unless presence.prime() attached it"""
+        if '_is_online' in self.__dict__:
+            return self._is_online
+        from . import presence
+        return bool(presence.is_online(self.id))
 
 
 class Contact(models.Model):
     """User contacts/address book"""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contacts')
-    contact_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contacted_by')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contacts', db_index=False)
+    contact_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='contacted_by', db_index=False)
     name = models.CharField(max_length=100)  # Custom name saved by user
     is_blocked = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -41,11 +73,28 @@ class Contact(models.Model):
     class Meta:
         unique_together = ['user', 'contact_user']
         ordering = ['name']
+        indexes = [
+            # Address book and "my contacts" subqueries, answered from the index
+            models.Index(fields=['user', 'name'], include=['contact_user', 'is_blocked'], name='contact_user_cover'),
+            # "Who has me as a contact" (status feed invalidation)
+            models.Index(fields=['contact_user'], include=['user'], name='contact_reverse_cover'),
+        ]
     
     def __str__(self):
         return f"{self.user.username}'s contact: {self.name}"
 
 
+class ChatManager(models.Manager):
+    # Columns the chat list and header render for each participant
+    PARTICIPANT_FIELDS = ('id', 'username', 'first_name', 'last_name', 'profile_picture', 'last_seen')
+    
+    def for_user(self, user):
+        """Chats the user is in, with creator and participants loaded up front"""
+        return self.filter(chatparticipant__user=user).select_related('created_by').prefetch_related(
+            models.Prefetch('participants', queryset=User.objects.only(*self.PARTICIPANT_FIELDS)),
+        )
+
+
 class Chat(models.Model):
     """Chat room - can be personal or group"""
     CHAT_TYPES = [
@@ -64,16 +113,43 @@ class Chat(models.Model):
     group_icon = models.ImageField(upload_to='group_icons/', null=True, blank=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='created_chats')
     
+    # "<lower user id>:<higher user id>" for personal chats, one chat per pair
+    personal_key = models.CharField(max_length=32, null=True, blank=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ChatManager()
+    
+    class Meta:
+        indexes = [
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='chat_name_trgm'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['personal_key'],
+                condition=models.Q(chat_type='personal'),
+                name='uniq_personal_chat',
+            ),
+            models.CheckConstraint(
+                check=models.Q(chat_type='personal') | models.Q(personal_key__isnull=True),
+                name='personal_key_only_personal',
+            ),
+        ]
+    
+    @staticmethod
+    def personal_key_for(user_id, other_user_id):
+        return f"{min(user_id, other_user_id)}:{max(user_id, other_user_id)}"
+    
     def __str__(self):
         if self.chat_type == 'group':
             return f"Group: {self.name}"
         elif self.chat_type == 'broadcast':
             return f"Broadcast: {self.name}"
         else:
-            participants = self.participants.all()[:2]
+            # Slice the prefetched list when there is one rather than querying again
+            prefetched = getattr(self, '_prefetched_objects_cache', {}).get('participants')
+            participants = prefetched[:2] if prefetched is not None else self.participants.all()[:2]
             return f"Chat: {' & '.join([p.username for p in participants])}"
 
 
@@ -84,8 +160,10 @@ class ChatParticipant(models.Model):
         ('member', 'Member'),
     ]
     
-    chat = models.ForeignKey(Chat, on_delete=models.CASCADE)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Single-column FK indexes are redundant: (chat, user) is unique and
+    # cp_user_pinned_idx leads with user
+    chat = models.ForeignKey(Chat, on_delete=models.CASCADE, db_index=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     role = models.CharField(max_length=10, choices=ROLES, default='member')
     joined_at = models.DateTimeField(auto_now_add=True)
     last_read_message = models.ForeignKey('Message', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
@@ -93,11 +171,160 @@ class ChatParticipant(models.Model):
     is_pinned = models.BooleanField(default=False)
     is_archived = models.BooleanField(default=False)
     
+    # Denormalized for the chat list so it needs no per-chat queries
+    unread_count = models.PositiveIntegerField(default=0)
+    last_message_preview = models.CharField(max_length=120, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    
     class Meta:
         unique_together = ['chat', 'user']
+        indexes = [
+            # Chat list: WHERE user_id = ... AND NOT is_archived ORDER BY is_pinned DESC, last_message_at DESC
+            models.Index(
+                fields=['user', 'is_archived', '-is_pinned', '-last_message_at'],
+                include=['chat'],
+                name='cp_user_pinned_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.user.username} in {self.chat}"
+    
+    @staticmethod
+    def message_preview(message):
+        return (message.content or f"[{message.message_type}]")[:120]
+    
+    @classmethod
+    def record_message(cls, message):
+        """Update every participant's chat-list fields for a new message in one UPDATE"""
+        cls.invalidate_chat_lists(cls.participant_ids(message.chat_id))
+        return cls.objects.filter(chat_id=message.chat_id).update(
+            last_message_preview=cls.message_preview(message),
+            last_message_at=message.created_at,
+            unread_count=models.Case(
+                models.When(user_id=message.sender_id, then=models.F('unread_count')),
+                default=models.F('unread_count') + 1,
+            ),
+        )
+    
+    @classmethod
+    def mark_read(cls, chat_id, user_id):
+        """Reset the user's unread counter for a chat"""
+        updated = cls.objects.filter(chat_id=chat_id, user_id=user_id, unread_count__gt=0).update(unread_count=0)
+        if updated:
+            cls.invalidate_chat_lists([user_id])
+        return updated
+    
+    @classmethod
+    def toggle(cls, chat_id, user_id, field):
+        """Flip a boolean flag in one UPDATE ... RETURNING; None if the user isn't in the chat"""
+        column = cls._meta.get_field(field).column
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {cls._meta.db_table} SET "{column}" = NOT "{column}" '
+                f'WHERE chat_id = %s AND user_id = %s RETURNING "{column}"',
+                [chat_id, user_id],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        cls.invalidate_chat_lists([user_id])
+        return row[0]
+    
+    @classmethod
+    def recount_unread(cls, chat_ids=None):
+        """Rebuild unread_count from receipts and delivery masks; returns rows corrected"""
+        # Only rows that drifted are written, so a clean table costs no UPDATEs
+        sql = f"""
+            WITH counts AS (
+                SELECT cp.id, (
+                    SELECT COUNT(*) FROM {MessageReceipt._meta.db_table} r
+                    JOIN {Message._meta.db_table} m ON m.id = r.message_id
+                    WHERE m.chat_id = cp.chat_id AND r.user_id = cp.user_id AND r.status <> 'read'
+                ) + (
+                    SELECT COUNT(*) FROM {Message._meta.db_table} m
+                    WHERE m.chat_id = cp.chat_id
+                      AND m.delivery ? cp.user_id::text
+                      AND m.delivery #>> ARRAY[cp.user_id::text, 'r'] IS NULL
+                ) AS unread
+                FROM {cls._meta.db_table} cp
+                {'WHERE cp.chat_id = ANY(%s::uuid[])' if chat_ids is not None else ''}
+            )
+            UPDATE {cls._meta.db_table} cp SET unread_count = counts.unread
+            FROM counts
+            WHERE cp.id = counts.id AND cp.unread_count <> counts.unread
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [[str(chat_id) for chat_id in chat_ids]] if chat_ids is not None else [])
+            return cursor.rowcount
+    
+    @staticmethod
+    def membership_cache_key(chat_id, user_id):
+        return f"chat_member:{chat_id}:{user_id}"
+    
+    @staticmethod
+    def participant_ids_cache_key(chat_id):
+        return f"chat_participant_ids:{chat_id}"
+    
+    @staticmethod
+    def chat_list_cache_key(user_id):
+        return f"chat_list:{user_id}"
+    
+    @classmethod
+    def invalidate_chat_lists(cls, user_ids):
+        """Drop cached chat lists once the current transaction commits"""
+        # Deleting earlier would let a concurrent request re-cache the old rows
+        keys = [cls.chat_list_cache_key(user_id) for user_id in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+    
+    @classmethod
+    def participant_ids(cls, chat_id):
+        """User ids of everyone in the chat, cached until membership changes"""
+        return cache.get_or_set(
+            cls.participant_ids_cache_key(chat_id),
+            lambda: list(cls.objects.filter(chat_id=chat_id).values_list('user_id', flat=True)),
+            300,
+        )
+
+
+class DeliveryStamp(models.Func):
+    """``delivery #>> '{user_id,key}'``; a path keeps numeric user ids as object keys"""
+    arg_joiner = ' #>> '
+    template = '(%(expressions)s)'
+    output_field = models.TextField()
+    
+    def __init__(self, user_id, key):
+        super().__init__(models.F('delivery'), models.Value([str(user_id), key]))
+
+
+class DeliveryMark(models.Func):
+    """Merge receipt timestamps into ``delivery[user_id]``, keeping any already recorded"""
+    output_field = models.JSONField()
+    
+    def __init__(self, user_id, **stamps):
+        super().__init__(models.F('delivery'), models.Value([str(user_id)]), models.Value(json.dumps(stamps)))
+    
+    def as_sql(self, compiler, connection, **extra_context):
+        (delivery, delivery_params), (path, path_params), (stamps, stamps_params) = (
+            compiler.compile(expression) for expression in self.get_source_expressions()
+        )
+        sql = f"jsonb_set({delivery}, {path}, {stamps}::jsonb || COALESCE({delivery} #> {path}, '{{}}'))"
+        return sql, (*delivery_params, *path_params, *stamps_params, *delivery_params, *path_params)
+
+
+class MessageManager(models.Manager):
+    # The narrow part of the row: enough to route, authorize and order a message
+    HEADER_FIELDS = ('id', 'chat_id', 'sender_id', 'message_type', 'created_at', 'deleted_for_everyone')
+    
+    def headers(self):
+        """Messages without content, media or location columns"""
+        return self.only(*self.HEADER_FIELDS)
+    
+    def for_chat(self, chat):
+        """A chat's messages with the relations the chat view renders"""
+        return self.filter(chat=chat).select_related('sender', 'reply_to__sender').prefetch_related(
+            'reactions', 'receipts',
+        )
 
 
 class Message(models.Model):
@@ -114,7 +341,7 @@ class Message(models.Model):
         ('voice', 'Voice Note'),
     ]
     
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_messages')
     
@@ -131,23 +358,69 @@ class Message(models.Model):
     forwarded_from = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='forwards')
     
     # Location data
-    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
-    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     
-    # Message metadata
-    is_deleted = models.BooleanField(default=False)
+    # Message metadata; starring and delete-for-me are per user (StarredMessage, DeletedMessage)
     deleted_for_everyone = models.BooleanField(default=False)
-    is_starred = models.BooleanField(default=False)
+    
+    # Group chats track receipts here, {user_id: {'s'|'d'|'r': iso timestamp}},
+    # instead of one MessageReceipt row per member
+    delivery = models.JSONField(default=dict, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     edited_at = models.DateTimeField(null=True, blank=True)
     
+    objects = MessageManager()
+    
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Chat history: WHERE chat_id = ... ORDER BY created_at
+            models.Index(fields=['chat', '-created_at'], name='msg_chat_created_idx'),
+            # Chat views exclude messages deleted for everyone
+            models.Index(
+                fields=['chat', '-created_at'],
+                condition=models.Q(deleted_for_everyone=False),
+                name='msg_chat_active_idx',
+            ),
+            models.Index(fields=['sender', '-created_at'], name='msg_sender_created_idx'),
+            GinIndex(OpClass(Upper('content'), name='gin_trgm_ops'), name='msg_content_trgm'),
+            # Append-only, so created_at follows physical row order
+            BrinIndex(fields=['created_at'], pages_per_range=32, name='msg_created_brin'),
+            # Bounding-box lookups over shared locations only
+            models.Index(
+                fields=['latitude', 'longitude'],
+                condition=models.Q(latitude__isnull=False),
+                name='msg_location_idx',
+            ),
+        ]
     
     def __str__(self):
-        content_preview = self.content[:50] if self.content else f"[{self.message_type}]"
+        # The admin changelist defers content and annotates a _preview instead
+        content = self.__dict__['_preview'] if '_preview' in self.__dict__ else self.content
+        content_preview = content[:50] if content else f"[{self.message_type}]"
         return f"{self.sender.username}: {content_preview}"
+    
+    @staticmethod
+    def initial_delivery(user_ids):
+        """Delivery mask for a new group message: sent to every recipient"""
+        sent_at = timezone.now().isoformat()
+        return {str(user_id): {'s': sent_at} for user_id in user_ids}
+    
+    @property
+    def receipt_status(self):
+        """Least advanced receipt state across recipients, or None without any"""
+        if self.delivery:
+            stamps = self.delivery.values()
+            if all('r' in stamp for stamp in stamps):
+                return 'read'
+            if all('d' in stamp for stamp in stamps):
+                return 'delivered'
+            return 'sent'
+        # all() so a prefetch of receipts is reused
+        receipt = next(iter(self.receipts.all()), None)
+        return receipt.status if receipt else None
 
 
 class MessageReceipt(models.Model):
@@ -158,7 +431,8 @@ class MessageReceipt(models.Model):
         ('read', 'Read'),
     ]
     
-    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='receipts')
+    # The unique (message, user) index also serves message lookups
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='receipts', db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='sent')
     delivered_at = models.DateTimeField(null=True, blank=True)
@@ -166,20 +440,70 @@ class MessageReceipt(models.Model):
     
     class Meta:
         unique_together = ['message', 'user']
+        indexes = [
+            # mark(..., 'read') probes only the user's outstanding receipts
+            models.Index(
+                fields=['user', 'message'],
+                condition=models.Q(status__in=['sent', 'delivered']),
+                name='receipt_user_unread_idx',
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.message.id} - {self.user.username}: {self.status}"
+        return f"{self.message_id} - {self.user.username}: {self.status}"
+    
+    @classmethod
+    def _behind(cls, messages, user_id, status):
+        """Receipt rows and masked messages where user_id has not reached status yet"""
+        statuses = [choice for choice, _ in cls.STATUS_CHOICES]
+        receipts = cls.objects.filter(
+            message__in=messages,
+            user_id=user_id,
+            status__in=statuses[:statuses.index(status)],
+        )
+        masked = messages.filter(
+            delivery__has_key=str(user_id)
+        ).alias(
+            stamp=DeliveryStamp(user_id, status[0])
+        ).filter(stamp__isnull=True)
+        return receipts, masked
+    
+    @classmethod
+    def pending(cls, messages, user_id, status):
+        """Ids of the messages in a queryset that mark() would advance"""
+        receipts, masked = cls._behind(messages, user_id, status)
+        return messages.filter(
+            models.Q(id__in=receipts.values('message_id')) | models.Q(id__in=masked.values('id'))
+        ).values_list('id', flat=True)
+    
+    @classmethod
+    def mark(cls, messages, user_id, status):
+        """Advance user_id to status on a Message queryset: receipt rows in 1:1 chats, the delivery mask in groups"""
+        now = timezone.now()
+        if status == 'read':
+            fields, stamps = {'read_at': now}, {'d': now.isoformat(), 'r': now.isoformat()}
+        else:
+            fields, stamps = {'delivered_at': now}, {'d': now.isoformat()}
+        
+        receipts, masked = cls._behind(messages, user_id, status)
+        updated = receipts.update(status=status, **fields)
+        updated += masked.update(delivery=DeliveryMark(user_id, **stamps))
+        return updated
 
 
 class MessageReaction(models.Model):
     """Message reactions (emojis)"""
-    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='reactions')
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='reactions', db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     emoji = models.CharField(max_length=10)  # Unicode emoji
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         unique_together = ['message', 'user']
+        indexes = [
+            # Reaction prefetches for a page of messages, answered from the index
+            models.Index(fields=['message'], include=['user', 'emoji'], name='reaction_message_cover'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} reacted {self.emoji} to message"
@@ -194,7 +518,7 @@ class Status(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statuses')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statuses', db_index=False)
     status_type = models.CharField(max_length=10, choices=STATUS_TYPES, default='text')
     
     # Content
@@ -209,6 +533,15 @@ class Status(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()  # 24 hours from creation
     
+    # Upper bound on a cached feed; entries also expire with their first status
+    FEED_CACHE_TIMEOUT = 300
+    
+    class Meta:
+        indexes = [
+            # Active statuses: WHERE user_id IN (...) AND expires_at > now(); also serves the FK
+            models.Index(fields=['user', 'expires_at'], name='status_user_expires_idx'),
+        ]
+    
     def save(self, *args, **kwargs):
         if not self.expires_at:
             self.expires_at = timezone.now() + timezone.timedelta(hours=24)
@@ -216,19 +549,45 @@ class Status(models.Model):
     
     def __str__(self):
         return f"{self.user.username}'s status ({self.status_type}) - {self.created_at}"
+    
+    @staticmethod
+    def feed_cache_key(user_id):
+        return f"status_feed:{user_id}"
+    
+    @classmethod
+    def invalidate_feeds(cls, user_ids):
+        """Drop cached contact-status feeds once the current transaction commits"""
+        keys = [cls.feed_cache_key(user_id) for user_id in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+    
+    @classmethod
+    def invalidate_feeds_showing(cls, user_id):
+        """Drop the feeds of everyone who has user_id as a contact"""
+        cls.invalidate_feeds(Contact.objects.filter(contact_user_id=user_id).values_list('user_id', flat=True))
 
 
 class StatusView(models.Model):
     """Track who viewed a status"""
     status = models.ForeignKey(Status, on_delete=models.CASCADE, related_name='views')
-    viewer = models.ForeignKey(User, on_delete=models.CASCADE)
+    viewer = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     viewed_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
+        # The unique index already answers "who viewed status S"
         unique_together = ['status', 'viewer']
+        indexes = [
+            models.Index(fields=['viewer'], include=['status'], name='sv_viewer_cover'),
+        ]
     
     def __str__(self):
         return f"{self.viewer.username} viewed {self.status.user.username}'s status"
+    
+    @classmethod
+    def record(cls, status, viewer_id):
+        """Record a view once; repeat views for the rest of the status' life only touch the cache"""
+        ttl = max(int((status.expires_at - timezone.now()).total_seconds()), 1)
+        if cache.add(f"status_view:{status.id}:{viewer_id}", True, ttl):
+            cls.objects.bulk_create([cls(status=status, viewer_id=viewer_id)], ignore_conflicts=True)
 
 
 class Call(models.Model):
@@ -249,8 +608,8 @@ class Call(models.Model):
     ]
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    caller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outgoing_calls')
-    receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='incoming_calls')
+    caller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='outgoing_calls', db_index=False)
+    receiver = models.ForeignKey(User, on_delete=models.CASCADE, related_name='incoming_calls', db_index=False)
     call_type = models.CharField(max_length=10, choices=CALL_TYPES, default='voice')
     status = models.CharField(max_length=10, choices=CALL_STATUS, default='initiated')
     
@@ -259,6 +618,13 @@ class Call(models.Model):
     ended_at = models.DateTimeField(null=True, blank=True)
     duration = models.IntegerField(default=0)  # Duration in seconds
     
+    class Meta:
+        indexes = [
+            # Call history, newest first, per side of the call; these also serve the FK lookups
+            models.Index(fields=['caller', '-started_at'], name='call_caller_started_idx'),
+            models.Index(fields=['receiver', '-started_at'], name='call_receiver_started_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.call_type.title()} call: {self.caller.username} → {self.receiver.username} ({self.status})"
 
@@ -297,11 +663,15 @@ class GroupCallParticipant(models.Model):
 class BlockedUser(models.Model):
     """Blocked users"""
     blocker = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blocked_users')
-    blocked = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blocked_by')
+    blocked = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blocked_by', db_index=False)
     blocked_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
+        # The unique index already covers lookups by blocker
         unique_together = ['blocker', 'blocked']
+        indexes = [
+            models.Index(fields=['blocked'], include=['blocker'], name='blk_blocked_cover'),
+        ]
     
     def __str__(self):
         return f"{self.blocker.username} blocked {self.blocked.username}"
@@ -340,16 +710,84 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            BrinIndex(fields=['created_at'], pages_per_range=32, name='notif_created_brin'),
+            # Unread badge and list: WHERE user_id = ... AND is_read = ... ORDER BY created_at DESC
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_unread_idx'),
+        ]
+    
+    # Cached badge counters are adjusted in place; the TTL bounds any drift
+    UNREAD_CACHE_TIMEOUT = 3600
     
     def __str__(self):
         return f"Notification for {self.user.username}: {self.title}"
+    
+    @staticmethod
+    def unread_cache_key(user_id):
+        return f"notifications_unread:{user_id}"
+    
+    @classmethod
+    def unread_count(cls, user_id):
+        """Unread notifications for the badge, counted from the database only on a cache miss"""
+        key = cls.unread_cache_key(user_id)
+        count = cache.get(key)
+        if count is None:
+            count = cls.objects.filter(user_id=user_id, is_read=False).count()
+            # add() so a counter incremented meanwhile is not overwritten
+            cache.add(key, count, cls.UNREAD_CACHE_TIMEOUT)
+        return count
+    
+    @classmethod
+    def adjust_unread(cls, user_ids, delta):
+        """Shift cached unread counters once the current transaction commits"""
+        def apply():
+            for user_id in user_ids:
+                try:
+                    cache.incr(cls.unread_cache_key(user_id), delta)
+                except ValueError:
+                    pass  # Not cached; the next read counts from the database
+        
+        transaction.on_commit(apply)
+    
+    @classmethod
+    def invalidate_unread(cls, user_ids):
+        """Drop cached unread counters once the current transaction commits, forcing a recount"""
+        keys = [cls.unread_cache_key(user_id) for user_id in user_ids]
+        transaction.on_commit(lambda: cache.delete_many(keys))
+    
+    @classmethod
+    def fanout_message(cls, message, recipient_ids):
+        """Create the new-message notification for every recipient in one INSERT"""
+        title = f"New message from {message.sender.first_name}"[:100]
+        body = message.content[:50] if message.content else f"[{message.message_type}]"
+        cls.adjust_unread(recipient_ids, 1)
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    user_id=user_id,
+                    notification_type='message',
+                    title=title,
+                    body=body,
+                    related_chat_id=message.chat_id,
+                    related_message=message,
+                )
+                for user_id in recipient_ids
+            ],
+            batch_size=500,
+        )
 
 
 class MediaGallery(models.Model):
     """Store media shared in chats for gallery view"""
+    class MediaType(models.IntegerChoices):
+        # Values are stored; keep them stable
+        IMAGE = 1, 'Image'
+        VIDEO = 2, 'Video'
+        DOCUMENT = 3, 'Document'
+    
     chat = models.ForeignKey(Chat, on_delete=models.CASCADE, related_name='media_gallery')
     message = models.ForeignKey(Message, on_delete=models.CASCADE)
-    media_type = models.CharField(max_length=10)  # image, video, document
+    media_type = models.PositiveSmallIntegerField(choices=MediaType.choices)
     uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -357,7 +795,7 @@ class MediaGallery(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.media_type} in {self.chat} by {self.uploaded_by.username}"
+        return f"{self.get_media_type_display()} in {self.chat} by {self.uploaded_by.username}"
 
 
 class DeletedMessage(models.Model):
@@ -370,4 +808,21 @@ class DeletedMessage(models.Model):
         unique_together = ['message', 'user']
     
     def __str__(self):
-        return f"{self.user.username} deleted message {self.message.id}"
\ No newline at end of file
+        return f"{self.user.username} deleted message {self.message_id}"
+
+
+class StarredMessage(models.Model):
+    """Messages starred by individual users"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='starred_messages')
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name='starred_by_users')
+    starred_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['user', 'message']
+        indexes = [
+            # Starred messages screen: WHERE user_id = ... ORDER BY starred_at DESC
+            models.Index(fields=['user', '-starred_at'], name='starred_user_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} starred message {self.message_id}"
\ No newline at end of file
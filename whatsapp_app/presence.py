@@ -0,0 +1,113 @@
+"""
+WhatsApp Clone Presence Tracking
+Path: whatsapp_app/presence.py
+
+Online status lives only in the cache: set on websocket connect/disconnect
+and kept alive by client heartbeats. The flush_presence task persists the
+matching last_seen times to the User table in bulk.
+"""
+
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Case, DateTimeField, Value, When
+
+from .models import User
+
+PRESENCE_TIMEOUT = 120  # seconds an online flag survives without a refresh
+FLUSH_INTERVAL = 60  # seconds per journal bucket, matches the beat schedule
+JOURNAL_TIMEOUT = FLUSH_INTERVAL * 5
+
+
+def _presence_key(user_id):
+    return f"user_online:{user_id}"
+
+
+def _journal_key(bucket, suffix):
+    return f"presence_journal:{bucket}:{suffix}"
+
+
+def _current_bucket():
+    return int(time.time() // FLUSH_INTERVAL)
+
+
+def _require_shared_cache():
+    # Consumers journal in the ASGI process and the worker flushes; a
+    # per-process cache would silently drop every last_seen update
+    if isinstance(caches['default'], LocMemCache):
+        raise ImproperlyConfigured(
+            "Presence tracking needs a shared cache such as Redis; "
+            "CACHES['default'] is LocMemCache"
+        )
+
+
+def set_online(user_id, is_online):
+    """Record a presence change in the cache and journal it for the next flush"""
+    _require_shared_cache()
+    cache.set(_presence_key(user_id), is_online, PRESENCE_TIMEOUT)
+    
+    # The journal is a counter plus one key per entry so the flush can find
+    # every changed user without scanning keys.
+    bucket = _current_bucket()
+    counter_key = _journal_key(bucket, 'count')
+    cache.add(counter_key, 0, JOURNAL_TIMEOUT)
+    try:
+        position = cache.incr(counter_key)
+    except ValueError:
+        position = 1
+        cache.set(counter_key, position, JOURNAL_TIMEOUT)
+    cache.set(_journal_key(bucket, position), (user_id, is_online, time.time()), JOURNAL_TIMEOUT)
+
+
+def refresh(user_id):
+    """Extend a live online flag, re-recording it if it has already expired"""
+    if not cache.touch(_presence_key(user_id), PRESENCE_TIMEOUT):
+        set_online(user_id, True)
+
+
+def is_online(user_id):
+    """Return the cached online flag, or None if it is unknown"""
+    return cache.get(_presence_key(user_id))
+
+
+def prime(users):
+    """Fetch the online flags of many User instances with one get_many and attach them"""
+    users = list(users)
+    keys = {user.id: _presence_key(user.id) for user in users}
+    flags = cache.get_many(list(keys.values()))
+    for user in users:
+        user._is_online = bool(flags.get(keys[user.id]))
+    return users
+
+
+def flush():
+    """Persist journaled last_seen times with a single UPDATE; returns users updated"""
+    _require_shared_cache()
+    current = _current_bucket()
+    last_flushed = cache.get('presence_journal:flushed', current - 2)
+    buckets = range(max(last_flushed + 1, current - 4), current)
+    
+    latest = {}
+    for bucket in buckets:
+        count = cache.get(_journal_key(bucket, 'count'), 0)
+        keys = [_journal_key(bucket, position) for position in range(1, count + 1)]
+        for user_id, _, seen_at in cache.get_many(keys).values():
+            latest[user_id] = seen_at
+        cache.delete_many(keys + [_journal_key(bucket, 'count')])
+    cache.set('presence_journal:flushed', current - 1, None)
+    
+    if not latest:
+        return 0
+    
+    return User.objects.filter(id__in=latest).update(
+        last_seen=Case(
+            *[
+                When(id=user_id, then=Value(datetime.fromtimestamp(seen_at, tz=dt_timezone.utc)))
+                for user_id, seen_at in latest.items()
+            ],
+            output_field=DateTimeField(),
+        ),
+    )
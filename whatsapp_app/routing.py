@@ -3,11 +3,12 @@ WhatsApp Clone WebSocket Routing
 Path: whatsapp_app/routing.py
 """
 
-from django.urls import re_path
+from django.urls import path
 from . import consumers
 
+# uuid converters reject malformed ids before a consumer is built
 websocket_urlpatterns = [
-    re_path(r'ws/chat/(?P<chat_id>[0-9a-f-]+)/$', consumers.ChatConsumer.as_asgi()),
-    re_path(r'ws/call/(?P<call_id>[0-9a-f-]+)/$', consumers.CallConsumer.as_asgi()),
-    re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
-]
\ No newline at end of file
+    path('ws/chat/<uuid:chat_id>/', consumers.ChatConsumer.as_asgi()),
+    path('ws/call/<uuid:call_id>/', consumers.CallConsumer.as_asgi()),
+    path('ws/notifications/', consumers.NotificationConsumer.as_asgi()),
+]
@@ -0,0 +1,49 @@
+"""
+WhatsApp Clone Signals
+Path: whatsapp_app/signals.py
+"""
+
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import ChatParticipant, Contact, Status, User
+
+
+@receiver([post_save, post_delete], sender=ChatParticipant)
+def invalidate_chat_membership(sender, instance, **kwargs):
+    """Drop the cached membership data used by the chat websocket and chat list"""
+    cache.delete_many([
+        ChatParticipant.membership_cache_key(instance.chat_id, instance.user_id),
+        ChatParticipant.participant_ids_cache_key(instance.chat_id),
+    ])
+    # Pin, mute, archive and leave all save or delete the membership row
+    ChatParticipant.invalidate_chat_lists([instance.user_id])
+
+
+@receiver(post_save, sender=Status)
+def invalidate_status_feeds(sender, instance, created, **kwargs):
+    """A new status shows up in the feed of everyone who has its author as a contact"""
+    if created:
+        Status.invalidate_feeds_showing(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Contact)
+def invalidate_contact_feed(sender, instance, **kwargs):
+    """Adding or removing a contact changes whose statuses the owner sees"""
+    Status.invalidate_feeds([instance.user_id])
+
+
+# Django's own handler calls user.save(update_fields=['last_login']), which
+# runs the model save path and its signals on every login
+user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+
+
+@receiver(user_logged_in, dispatch_uid='update_last_login')
+def record_last_login(sender, user, **kwargs):
+    """Stamp last_login with a bare UPDATE"""
+    user.last_login = timezone.now()
+    User.objects.filter(pk=user.pk).update(last_login=user.last_login)
@@ -0,0 +1,96 @@
+"""
+WhatsApp Clone Background Tasks
+Path: whatsapp_app/tasks.py
+"""
+
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from celery import shared_task
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+from . import presence
+from .consumers import broadcast_message
+from .models import ChatParticipant, Message, Notification, Status
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_RETENTION_DAYS = 90
+PRUNE_BATCH_SIZE = 5000
+
+
+def delete_in_batches(queryset, batch_size=PRUNE_BATCH_SIZE):
+    """Delete matching rows in short primary-key batches; returns rows of queryset.model deleted"""
+    label = queryset.model._meta.label
+    deleted = 0
+    while True:
+        # Each batch is its own short transaction, so WAL and locks stay bounded
+        batch = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        _, per_model = queryset.model.objects.filter(pk__in=batch).delete()
+        deleted += per_model.get(label, 0)
+
+
+@shared_task
+def flush_presence():
+    """Persist online status changes recorded by the websocket consumers"""
+    return presence.flush()
+
+
+@shared_task
+def recount_unread():
+    """Correct unread counters that drifted from the receipts (e.g. after bulk edits)"""
+    return ChatParticipant.recount_unread()
+
+
+@shared_task
+def prune_notifications(days=NOTIFICATION_RETENTION_DAYS):
+    """Delete notifications older than the retention window"""
+    cutoff = timezone.now() - timedelta(days=days)
+    expired = Notification.objects.filter(created_at__lt=cutoff)
+    
+    # Cached badges still count the unread ones being deleted
+    user_ids = list(expired.filter(is_read=False).values_list('user_id', flat=True).distinct())
+    deleted = delete_in_batches(expired)
+    Notification.invalidate_unread(user_ids)
+    return deleted
+
+
+@shared_task
+def prune_statuses():
+    """Delete statuses (and their views) once they have expired"""
+    return delete_in_batches(Status.objects.filter(expires_at__lte=timezone.now()))
+
+
+def prune_messages(days):
+    """Delete messages (and their receipts, reactions, ...) older than days"""
+    cutoff = timezone.now() - timedelta(days=days)
+    return delete_in_batches(Message.objects.filter(created_at__lt=cutoff))
+
+
+@shared_task
+def fanout_message(message_id):
+    """Notify every recipient of a message sent over HTTP and push it to open sockets"""
+    # The push reaches the ASGI servers only through a shared (Redis) channel layer
+    message = Message.objects.select_related('sender').filter(id=message_id).first()
+    if message is None:
+        return 0
+    recipient_ids = [
+        user_id for user_id in ChatParticipant.participant_ids(message.chat_id)
+        if user_id != message.sender_id
+    ]
+    Notification.fanout_message(message, recipient_ids)
+    async_to_sync(broadcast_message)(message, recipient_ids)
+    return len(recipient_ids)
+
+
+def enqueue_fanout(message_id):
+    """Queue fanout_message; if the broker is unreachable, fan out in this process"""
+    try:
+        fanout_message.delay(message_id)
+    except OperationalError:
+        logger.warning("Broker unavailable; fanning out message %s inline", message_id)
+        fanout_message(message_id)
@@ -1,14 +1,22 @@
+from datetime import datetime
+from functools import lru_cache
+
 from django import template
+from django.db.models.manager import BaseManager
+from django.db.models.query import QuerySet
 
 register = template.Library()
 
+# strftime directives finer than a minute; formats using them are not memoized
+SECOND_DIRECTIVES = ('%S', '%f', '%s', '%c', '%X', '%T', '%r')
+
 # Get value from dictionary by key
-@register.filter
+@register.filter(is_safe=True)
 def get(dict_obj, key):
-    try:
+    if isinstance(dict_obj, dict):
         return dict_obj.get(key)
-    except:
-        return None
+    getter = getattr(dict_obj, 'get', None)
+    return getter(key) if callable(getter) else None
 
 # Get attribute of an object dynamically
 @register.filter
@@ -18,15 +26,29 @@ def get_attr(obj, attr):
 # Convert queryset or list to count
 @register.filter
 def count(value):
-    try:
+    if isinstance(value, (QuerySet, BaseManager)):
+        # count() reuses an evaluated (or prefetched) result cache, else one COUNT(*)
         return value.count()
-    except:
-        return len(value)
+    return len(value) if value is not None else 0
+
+@lru_cache(maxsize=None)
+def _minute_resolution(fmt):
+    return not any(directive in fmt for directive in SECOND_DIRECTIVES)
+
+@lru_cache(maxsize=1024)
+def _strftime_minute(minute, tzinfo, fmt):
+    # tzinfo is part of the key: equal instants in other zones format differently
+    return minute.strftime(fmt)
 
 # Format datetime nicely
 @register.filter
 def format_time(value, fmt="%Y-%m-%d %H:%M"):
-    return value.strftime(fmt) if value else ""
+    if not value:
+        return ""
+    if isinstance(value, datetime) and _minute_resolution(fmt):
+        # Messages cluster within the same minute, so most calls hit the cache
+        return _strftime_minute(value.replace(second=0, microsecond=0), value.tzinfo, fmt)
+    return value.strftime(fmt)
 
 # Limit text to n characters
 @register.filter
@@ -34,6 +56,8 @@ def truncate_chars(value, num):
     return value[:num] + "..." if len(value) > num else value
 
 # Check if string contains text
-@register.filter
+@register.filter(is_safe=True)
 def contains(text, word):
-    return word in text
+    if isinstance(text, str):
+        return isinstance(word, str) and word in text
+    return bool(text) and hasattr(text, '__contains__') and word in text
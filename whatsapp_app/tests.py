@@ -1,3 +1,255 @@
-from django.test import TestCase
+"""
+WhatsApp Clone Tests
+Path: whatsapp_app/tests.py
+"""
 
-# Create your tests here.
+import re
+from datetime import timedelta
+from html import unescape
+from urllib.parse import parse_qs, urlsplit
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import views
+from .models import Chat, ChatParticipant, Message, MessageReceipt, Notification, User
+from .tasks import prune_notifications
+
+
+def make_user(username):
+    return User.objects.create_user(username=username, password='password', phone_number=f'test-{username}')
+
+
+def make_chat(chat_type, *users, **fields):
+    chat = Chat.objects.create(chat_type=chat_type, **fields)
+    ChatParticipant.objects.bulk_create([ChatParticipant(chat=chat, user=user) for user in users])
+    return chat
+
+
+class DeliveryMaskTests(TestCase):
+    """MessageReceipt.mark against the JSONB delivery mask of group messages"""
+
+    def setUp(self):
+        self.alice, self.bob, self.carol = (make_user(name) for name in ('alice', 'bob', 'carol'))
+        self.chat = make_chat('group', self.alice, self.bob, self.carol, name='Test group')
+        self.message = Message.objects.create(
+            chat=self.chat,
+            sender=self.alice,
+            content='hello',
+            delivery=Message.initial_delivery([self.bob.id, self.carol.id]),
+        )
+        self.messages = Message.objects.filter(id=self.message.id)
+
+    def stamps(self, user):
+        self.message.refresh_from_db()
+        return self.message.delivery[str(user.id)]
+
+    def test_delivered_then_read(self):
+        sent_at = self.stamps(self.bob)['s']
+
+        self.assertEqual(MessageReceipt.mark(self.messages, self.bob.id, 'delivered'), 1)
+        delivered = self.stamps(self.bob)
+        self.assertEqual(delivered['s'], sent_at)
+        self.assertIn('d', delivered)
+        self.assertNotIn('r', delivered)
+        self.assertEqual(self.message.receipt_status, 'sent')
+
+        self.assertEqual(list(MessageReceipt.pending(self.messages, self.bob.id, 'read')), [self.message.id])
+        self.assertEqual(MessageReceipt.mark(self.messages, self.bob.id, 'read'), 1)
+        read = self.stamps(self.bob)
+        self.assertEqual(read['d'], delivered['d'])  # earlier stamps are kept
+        self.assertIn('r', read)
+        self.assertNotIn('d', self.stamps(self.carol))
+
+        # Carol is still only sent to, so the message as a whole is not read yet
+        self.assertEqual(self.message.receipt_status, 'sent')
+        self.assertEqual(MessageReceipt.mark(self.messages, self.carol.id, 'read'), 1)
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.receipt_status, 'read')
+
+    def test_mark_is_idempotent(self):
+        MessageReceipt.mark(self.messages, self.bob.id, 'read')
+        read = self.stamps(self.bob)
+
+        self.assertEqual(MessageReceipt.mark(self.messages, self.bob.id, 'read'), 0)
+        self.assertEqual(MessageReceipt.mark(self.messages, self.bob.id, 'delivered'), 0)
+        self.assertFalse(MessageReceipt.pending(self.messages, self.bob.id, 'read').exists())
+        self.assertEqual(self.stamps(self.bob), read)
+
+    def test_sender_has_no_stamps(self):
+        self.assertEqual(MessageReceipt.mark(self.messages, self.alice.id, 'read'), 0)
+        self.message.refresh_from_db()
+        self.assertNotIn(str(self.alice.id), self.message.delivery)
+
+
+class ReceiptRowTests(TestCase):
+    """MessageReceipt.mark against receipt rows in personal chats"""
+
+    def setUp(self):
+        self.alice, self.bob = make_user('alice'), make_user('bob')
+        self.chat = make_chat('personal', self.alice, self.bob)
+        self.message = Message.objects.create(chat=self.chat, sender=self.alice, content='hello')
+        self.receipt = MessageReceipt.objects.create(message=self.message, user=self.bob)
+        self.messages = Message.objects.filter(id=self.message.id)
+
+    def test_status_only_moves_forward(self):
+        self.assertEqual(MessageReceipt.mark(self.messages, self.bob.id, 'read'), 1)
+        self.assertEqual(MessageReceipt.mark(self.messages, self.bob.id, 'delivered'), 0)
+
+        self.receipt.refresh_from_db()
+        self.assertEqual(self.receipt.status, 'read')
+        self.assertIsNotNone(self.receipt.read_at)
+        self.assertEqual(Message.objects.get(id=self.message.id).receipt_status, 'read')
+
+
+class ToggleTests(TestCase):
+    """ChatParticipant.toggle and its UPDATE ... RETURNING"""
+
+    def setUp(self):
+        self.alice, self.bob = make_user('alice'), make_user('bob')
+        self.chat = make_chat('group', self.alice, name='Test group')
+
+    def test_flips_and_returns_new_value(self):
+        self.assertIs(ChatParticipant.toggle(self.chat.id, self.alice.id, 'is_pinned'), True)
+        self.assertTrue(ChatParticipant.objects.get(chat=self.chat, user=self.alice).is_pinned)
+
+        self.assertIs(ChatParticipant.toggle(self.chat.id, self.alice.id, 'is_pinned'), False)
+        participant = ChatParticipant.objects.get(chat=self.chat, user=self.alice)
+        self.assertFalse(participant.is_pinned)
+        self.assertFalse(participant.is_muted)
+
+    def test_non_member(self):
+        self.assertIsNone(ChatParticipant.toggle(self.chat.id, self.bob.id, 'is_muted'))
+
+
+class RecountUnreadTests(TestCase):
+    """ChatParticipant.recount_unread over receipt rows and delivery masks"""
+
+    def setUp(self):
+        self.alice, self.bob, self.carol = (make_user(name) for name in ('alice', 'bob', 'carol'))
+
+        self.personal = make_chat('personal', self.alice, self.bob)
+        for status in ('sent', 'delivered', 'read'):
+            message = Message.objects.create(chat=self.personal, sender=self.alice, content=status)
+            MessageReceipt.objects.create(message=message, user=self.bob, status=status)
+
+        self.group = make_chat('group', self.alice, self.carol, name='Test group')
+        Message.objects.create(
+            chat=self.group,
+            sender=self.alice,
+            content='hello',
+            delivery=Message.initial_delivery([self.carol.id]),
+        )
+
+        self.chat_ids = [self.personal.id, self.group.id]
+
+    def unread(self, chat, user):
+        return ChatParticipant.objects.get(chat=chat, user=user).unread_count
+
+    def test_corrects_drifted_counters(self):
+        ChatParticipant.objects.filter(chat=self.personal, user=self.bob).update(unread_count=7)
+        # Nothing was ever counted for carol
+
+        self.assertEqual(ChatParticipant.recount_unread(self.chat_ids), 2)
+        self.assertEqual(self.unread(self.personal, self.bob), 2)
+        self.assertEqual(self.unread(self.group, self.carol), 1)
+        self.assertEqual(self.unread(self.personal, self.alice), 0)
+
+    def test_leaves_clean_rows_untouched(self):
+        ChatParticipant.objects.filter(chat=self.personal, user=self.bob).update(unread_count=2)
+        ChatParticipant.objects.filter(chat=self.group, user=self.carol).update(unread_count=1)
+
+        self.assertEqual(ChatParticipant.recount_unread(self.chat_ids), 0)
+        self.assertEqual(self.unread(self.personal, self.bob), 2)
+
+
+class PruneNotificationsTests(TestCase):
+    """prune_notifications keeps the cached unread badge in step"""
+
+    def test_cached_badge_drops_pruned_unread(self):
+        user = make_user('alice')
+        old, recent = Notification.objects.bulk_create([
+            Notification(user=user, notification_type='message', title='old', body=''),
+            Notification(user=user, notification_type='message', title='recent', body=''),
+        ])
+        Notification.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=100))
+        self.assertEqual(Notification.unread_count(user.id), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(prune_notifications(), 1)
+        self.assertEqual(Notification.unread_count(user.id), 1)
+
+
+@override_settings(TIME_ZONE='Africa/Nairobi')
+class ChatListPaginationTests(TestCase):
+    """Keyset pages of chat_list_view, followed through the "Load more" link"""
+
+    def setUp(self):
+        self.user = make_user('alice')
+        self.client.force_login(self.user)
+
+        # Two boundaries among chats with messages, the last one among empty chats
+        size = views.CHAT_LIST_PAGE_SIZE
+        timed, empty = 2 * size - 2, 5
+        chats = Chat.objects.bulk_create(
+            [Chat(chat_type='group', name=f'Group {i}') for i in range(timed + empty)]
+        )
+
+        start = timezone.now().replace(microsecond=123456)
+        times = [start - timedelta(minutes=i) for i in range(timed)]
+        # A tie straddling the first boundary has to be split by id
+        for i in range(size - 2, size + 2):
+            times[i] = times[size - 2]
+        times += [None] * empty
+
+        ChatParticipant.objects.bulk_create([
+            ChatParticipant(chat=chat, user=self.user, last_message_at=time)
+            for chat, time in zip(chats, times)
+        ])
+
+        self.expected = [
+            chat.id for chat, time in sorted(
+                zip(chats, times),
+                key=lambda pair: (pair[1] is not None, pair[1] or start, pair[0].id),
+                reverse=True,
+            )
+        ]
+
+    def next_link(self, response):
+        match = re.search(r'href="(\?before=[^"]+)"', response.content.decode())
+        return unescape(match.group(1)) if match else None
+
+    def test_pages_cover_every_chat_once(self):
+        url = reverse('chat_list')
+        seen = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            seen += [chat.id for chat in response.context['chats']]
+            pages += 1
+            link = self.next_link(response)
+            url = reverse('chat_list') + link if link else None
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, self.expected)
+
+    def test_cursor_round_trips_offset_and_microseconds(self):
+        response = self.client.get(reverse('chat_list'))
+        next_chat = response.context['next_chat']
+
+        query = parse_qs(urlsplit(self.next_link(response)).query)
+        self.assertTrue(query['before_ts'][0].endswith('+03:00'))
+        self.assertEqual(parse_datetime(query['before_ts'][0]), next_chat.latest_message_time)
+        self.assertEqual(query['before'][0], str(next_chat.id))
+
+    def test_malformed_timestamp_falls_back_to_first_page(self):
+        first = self.client.get(reverse('chat_list'))
+
+        for before_ts in ('garbage', '2024-13-45T00:00:00'):
+            response = self.client.get(reverse('chat_list'), {'before': self.expected[5], 'before_ts': before_ts})
+            self.assertEqual(
+                [chat.id for chat in response.context['chats']],
+                [chat.id for chat in first.context['chats']],
+            )
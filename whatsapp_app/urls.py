@@ -52,5 +52,6 @@ urlpatterns = [
     
     # Notifications
     path('notifications/', views.notifications_view, name='notifications'),
+    path('notifications/unread/', views.unread_counts, name='unread_counts'),
     path('notifications/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
 ]
\ No newline at end of file
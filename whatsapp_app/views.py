@@ -6,20 +6,28 @@ Path: views.py
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponse
-from django.db.models import Q, Max, Count, Prefetch
+from django.http import Http404, JsonResponse, HttpResponse
+from django.db.models import Q, Max, Count, Prefetch, Value
+from django.db.models.functions import Concat
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.views.decorators.http import require_http_methods
 from django.core.paginator import Paginator
 from django.db import transaction
+from django.core.cache import cache
 from datetime import timedelta
 import json
+import uuid
+import orjson
 
 from .models import (
     User, Contact, Chat, ChatParticipant, Message, MessageReceipt,
     MessageReaction, Status, StatusView, Call, GroupCall, GroupCallParticipant,
-    BlockedUser, ArchivedChat, Notification, MediaGallery, DeletedMessage
+    BlockedUser, ArchivedChat, Notification, MediaGallery, DeletedMessage,
+    StarredMessage
 )
+from . import presence
+from .tasks import enqueue_fanout
 
 
 # ==================== Authentication Views ====================
@@ -74,8 +82,7 @@ def login_view(request):
         if user is not None:
             login(request, user)
             # Update online status
-            user.is_online = True
-            user.save(update_fields=['is_online'])
+            presence.set_online(user.id, True)
             return JsonResponse({'success': True, 'redirect': '/chats/'})
         else:
             return JsonResponse({'error': 'Invalid credentials'}, status=400)
@@ -86,8 +93,7 @@ def login_view(request):
 @login_required
 def logout_view(request):
     """User logout"""
-    request.user.is_online = False
-    request.user.save(update_fields=['is_online'])
+    presence.set_online(request.user.id, False)
     logout(request)
     return redirect('login')
 
@@ -132,21 +138,63 @@ def update_privacy_settings(request):
 
 # ==================== Chat List & Search Views ====================
 
-from django.db.models import Max, OuterRef, Subquery
+from django.db.models import F, Max, OuterRef, Subquery
 from django.contrib.auth.decorators import login_required
 from django.db.models import Prefetch
 
+CHAT_LIST_CACHE_TIMEOUT = 60
+CHAT_LIST_PAGE_SIZE = 30
+
+
 @login_required
 def chat_list_view(request):
+    # Keyset cursor: the last chat of the previous page (its id and message time)
+    before = None
+    if request.GET.get('before'):
+        before_ts = request.GET.get('before_ts')
+        try:
+            before_id = uuid.UUID(request.GET['before'])
+            before_time = parse_datetime(before_ts) if before_ts else None
+        except ValueError:
+            before_id = before_time = None
+        # A malformed timestamp parses to None, which would mean "only empty chats remain"
+        if before_id and not (before_ts and before_time is None):
+            before = (before_time, before_id)
+
+    if before:
+        # Later pages are read straight from the index; only the first page is cached
+        chats = _chat_list(request.user, before)
+    else:
+        # Invalidated by ChatParticipant.invalidate_chat_lists whenever a row it shows changes
+        cache_key = ChatParticipant.chat_list_cache_key(request.user.id)
+        chats = cache.get(cache_key)
+        if chats is None:
+            chats = _chat_list(request.user)
+            cache.set(cache_key, chats, CHAT_LIST_CACHE_TIMEOUT)
+
+    # Presence is never cached with the list; one get_many covers every participant
+    presence.prime(user for chat in chats for user in chat.participants.all())
+
+    return render(request, 'chat_list.html', {
+        'chats': chats,
+        'next_chat': chats[-1] if len(chats) == CHAT_LIST_PAGE_SIZE else None,
+    })
+
+
+def _chat_list(user, before=None):
+    """One page of the user's chats as model instances, prefetches included, ready to cache"""
     latest_message = Message.objects.filter(
         chat=OuterRef('pk')
     ).order_by('-created_at')
 
     chats = (
-        Chat.objects.filter(participants=request.user)
-        .annotate(latest_message_time=Subquery(latest_message.values('created_at')[:1]))
+        Chat.objects.for_user(user)
+        .annotate(
+            # Both maintained on the membership row, so they ride along on the same join
+            latest_message_time=F('chatparticipant__last_message_at'),
+            unread_count=F('chatparticipant__unread_count'),
+        )
         .prefetch_related(
-            'participants',
             Prefetch(
                 'messages',
                 queryset=Message.objects.filter(
@@ -154,21 +202,22 @@ def chat_list_view(request):
                 )
             )
         )
-        .order_by('-latest_message_time')
     )
 
-    unread_counts = {
-        chat.id: Message.objects.filter(chat=chat)
-        .exclude(sender=request.user)
-        .exclude(receipts__user=request.user, receipts__status='read')
-        .count()
-        for chat in chats
-    }
+    if before:
+        before_time, before_id = before
+        if before_time is None:
+            # Past the chats with messages; only empty chats remain
+            chats = chats.filter(latest_message_time__isnull=True, id__lt=before_id)
+        else:
+            chats = chats.filter(
+                Q(latest_message_time__lt=before_time)
+                | Q(latest_message_time=before_time, id__lt=before_id)
+                | Q(latest_message_time__isnull=True)
+            )
 
-    return render(request, 'chat_list.html', {
-        'chats': chats,
-        'unread_counts': unread_counts,
-    })
+    chats = chats.order_by(F('latest_message_time').desc(nulls_last=True), '-id')
+    return list(chats[:CHAT_LIST_PAGE_SIZE])
 
 
 @login_required
@@ -179,11 +228,12 @@ def search_chats(request):
     if not query:
         return JsonResponse({'results': []})
     
-    # Search in chat names and messages
-    chat_results = Chat.objects.filter(
-        Q(participants=request.user) &
-        (Q(name__icontains=query) | Q(messages__content__icontains=query))
-    ).distinct()[:10]
+    # Search in chat names and messages. Matching messages are a semi-join
+    # rather than a JOIN + DISTINCT, so each side can use its trigram index
+    matching_chats = Message.objects.filter(content__icontains=query).values('chat_id')
+    chat_results = Chat.objects.filter(chatparticipant__user=request.user).filter(
+        Q(name__icontains=query) | Q(id__in=matching_chats)
+    ).only('id', 'name', 'chat_type')[:10]
     
     results = []
     for chat in chat_results:
@@ -210,7 +260,9 @@ def search_contacts(request):
         Q(first_name__icontains=query) |
         Q(last_name__icontains=query) |
         Q(phone_number__icontains=query)
-    ).exclude(id=request.user.id)[:20]
+    ).exclude(id=request.user.id).only(
+        'id', 'username', 'first_name', 'last_name', 'phone_number', 'profile_picture', 'about'
+    )[:20]
     
     results = []
     for user in users:
@@ -230,32 +282,30 @@ def search_contacts(request):
 
 @login_required
 def chat_detail_view(request, chat_id):
-    chat = get_object_or_404(Chat, id=chat_id, participants=request.user)
+    chat = get_object_or_404(Chat.objects.for_user(request.user), id=chat_id)
 
     chat_participant, _ = ChatParticipant.objects.get_or_create(
         chat=chat,
         user=request.user
     )
 
+    # for_chat joins the sender and the replied-to message with its sender,
+    # and prefetches receipts and reactions in one query each
     messages = (
-        Message.objects.filter(chat=chat)
-        .exclude(deleted_for_everyone=True)  # Messages deleted for all
+        Message.objects.for_chat(chat)
+        .filter(deleted_for_everyone=False)  # Messages deleted for all
         .exclude(deleted_by_users__user=request.user)  # Messages deleted by THIS user
-        .select_related('sender')
-        .prefetch_related('receipts', 'reactions', 'reply_to')
         .order_by('created_at')
     )
 
 
-    unread_receipts = MessageReceipt.objects.filter(
-        message__chat=chat,
-        user=request.user,
-        status__in=['sent', 'delivered']
-    ).exclude(message__sender=request.user)
+    # Not gated on the counter, which can drift until recount_unread repairs it;
+    # both only touch rows that are still unread, so a caught-up chat writes nothing
+    MessageReceipt.mark(Message.objects.filter(chat=chat), request.user.id, 'read')
+    ChatParticipant.mark_read(chat.id, request.user.id)
 
-    unread_receipts.update(status='read', read_at=timezone.now())
-
-    other_participants = chat.participants.exclude(id=request.user.id)
+    # Taken from the prefetched participants; the template reads it several times
+    other_participants = presence.prime(p for p in chat.participants.all() if p.id != request.user.id)
 
     context = {
         'chat': chat,
@@ -274,31 +324,26 @@ def create_personal_chat(request):
         data = json.loads(request.body)
         other_user_id = data.get('user_id')
         
-        other_user = get_object_or_404(User, id=other_user_id)
-        
-        # Check if chat already exists
-        existing_chat = Chat.objects.filter(
-            chat_type='personal',
-            participants=request.user
-        ).filter(
-            participants=other_user
-        ).first()
-        
-        if existing_chat:
-            return JsonResponse({
-                'success': True,
-                'chat_id': str(existing_chat.id),
-                'redirect': f'/chats/{existing_chat.id}/'
-            })
-        
-        # Create new chat
-        chat = Chat.objects.create(
-            chat_type='personal',
-            created_by=request.user
-        )
+        # Only the id is needed to build the pair's key
+        other_user = get_object_or_404(User.objects.only('id'), id=other_user_id)
         
-        ChatParticipant.objects.create(chat=chat, user=request.user, role='member')
-        ChatParticipant.objects.create(chat=chat, user=other_user, role='member')
+        # One indexed lookup on the pair's key; the partial unique constraint
+        # makes get_or_create re-read if a concurrent request created it first
+        with transaction.atomic():
+            chat, created = Chat.objects.get_or_create(
+                chat_type='personal',
+                personal_key=Chat.personal_key_for(request.user.id, other_user.id),
+                defaults={'created_by': request.user},
+            )
+            
+            if created:
+                user_ids = {request.user.id, other_user.id}
+                ChatParticipant.objects.bulk_create([
+                    ChatParticipant(chat=chat, user_id=user_id, role='member')
+                    for user_id in user_ids
+                ])
+                # bulk_create skips the membership signals
+                ChatParticipant.invalidate_chat_lists(user_ids)
         
         return JsonResponse({
             'success': True,
@@ -320,33 +365,32 @@ def create_group_chat(request):
         if not name or not participant_ids:
             return JsonResponse({'error': 'Name and participants required'}, status=400)
         
-        # Create group
-        chat = Chat.objects.create(
-            chat_type='group',
-            name=name,
-            description=description,
-            created_by=request.user
-        )
-        
-        if 'group_icon' in request.FILES:
-            chat.group_icon = request.FILES['group_icon']
-            chat.save()
-        
-        # Add creator as admin
-        ChatParticipant.objects.create(
-            chat=chat,
-            user=request.user,
-            role='admin'
-        )
-        
-        # Add other participants
-        for user_id in participant_ids:
-            user = User.objects.get(id=user_id)
-            ChatParticipant.objects.create(
-                chat=chat,
-                user=user,
-                role='member'
+        # Resolve every id in one query before writing anything
+        try:
+            requested_ids = {int(user_id) for user_id in participant_ids} - {request.user.id}
+        except ValueError:
+            return JsonResponse({'error': 'Invalid participants'}, status=400)
+        member_ids = set(User.objects.filter(id__in=requested_ids).values_list('id', flat=True))
+        if not member_ids or member_ids != requested_ids:
+            return JsonResponse({'error': 'Invalid participants'}, status=400)
+        
+        with transaction.atomic():
+            # Create group
+            chat = Chat.objects.create(
+                chat_type='group',
+                name=name,
+                description=description,
+                group_icon=request.FILES.get('group_icon'),
+                created_by=request.user
+            )
+            
+            # Creator as admin and the other participants, in one INSERT
+            ChatParticipant.objects.bulk_create(
+                [ChatParticipant(chat=chat, user=request.user, role='admin')]
+                + [ChatParticipant(chat=chat, user_id=user_id, role='member') for user_id in member_ids]
             )
+            # bulk_create skips the membership signals
+            ChatParticipant.invalidate_chat_lists([request.user.id, *member_ids])
         
         return JsonResponse({
             'success': True,
@@ -384,25 +428,36 @@ def send_message(request):
         if 'media_file' in request.FILES:
             message_data['media_file'] = request.FILES['media_file']
         
-        message = Message.objects.create(**message_data)
+        recipient_ids = list(chat.participants.exclude(id=request.user.id).values_list('id', flat=True))
         
-        # Create receipts for all participants except sender
-        other_participants = chat.participants.exclude(id=request.user.id)
-        for participant in other_participants:
-            MessageReceipt.objects.create(
-                message=message,
-                user=participant,
-                status='sent'
-            )
+        # Groups keep receipts on the message itself rather than a row per member
+        if chat.chat_type == 'group':
+            message_data['delivery'] = Message.initial_delivery(recipient_ids)
         
-        # Create media gallery entry if needed
-        if message_type in ['image', 'video', 'document']:
-            MediaGallery.objects.create(
-                chat=chat,
-                message=message,
-                media_type=message_type,
-                uploaded_by=request.user
-            )
+        # One commit for the message and everything written alongside it
+        with transaction.atomic():
+            message = Message.objects.create(**message_data)
+            
+            # Create receipts for all participants except sender
+            if chat.chat_type != 'group':
+                MessageReceipt.objects.bulk_create([
+                    MessageReceipt(message=message, user_id=user_id, status='sent')
+                    for user_id in recipient_ids
+                ])
+            
+            ChatParticipant.record_message(message)
+            
+            # Create media gallery entry if needed
+            if message_type in ['image', 'video', 'document']:
+                MediaGallery.objects.create(
+                    chat=chat,
+                    message=message,
+                    media_type=MediaGallery.MediaType[message_type.upper()],
+                    uploaded_by=request.user
+                )
+            
+            # Notifications and the socket push scale with the group, so a worker does them
+            transaction.on_commit(lambda: enqueue_fanout(str(message.id)))
         
         return JsonResponse({
             'success': True,
@@ -421,30 +476,30 @@ def get_messages(request, chat_id):
     before_id = request.GET.get('before')
     limit = int(request.GET.get('limit', 50))
     
-    messages = Message.objects.filter(chat=chat).exclude(
-        deleted_for_everyone=True
-    ).exclude(
-        deletedmessage__user=request.user
-    ).select_related('sender').prefetch_related('receipts', 'reactions')
+    # deleted_for_everyone=False matches the msg_chat_active_idx predicate
+    messages = Message.objects.filter(chat=chat, deleted_for_everyone=False).exclude(
+        deleted_by_users__user=request.user
+    )
     
     if before_id:
-        messages = messages.filter(created_at__lt=Message.objects.get(id=before_id).created_at)
-    
-    messages = messages.order_by('-created_at')[:limit]
-    
-    messages_data = []
-    for message in reversed(list(messages)):
-        messages_data.append({
-            'id': str(message.id),
-            'sender_id': message.sender.id,
-            'sender_name': f"{message.sender.first_name} {message.sender.last_name}",
-            'content': message.content,
-            'message_type': message.message_type,
-            'created_at': message.created_at.isoformat(),
-            'is_own': message.sender == request.user,
-        })
+        # Keyset page on (created_at, id) with the cursor resolved inside the same query
+        cursor_at = Subquery(Message.objects.filter(id=before_id, chat=chat).values('created_at')[:1])
+        messages = messages.filter(
+            Q(created_at__lt=cursor_at) | Q(created_at=cursor_at, id__lt=before_id)
+        )
+    
+    # Rows come back as dicts shaped like the response; no model instances are built
+    messages = messages.order_by('-created_at', '-id').values(
+        'id', 'sender_id', 'content', 'message_type', 'created_at',
+        sender_name=Concat('sender__first_name', Value(' '), 'sender__last_name'),
+    )[:limit]
+    
+    messages_data = list(messages)[::-1]
+    for message in messages_data:
+        message['is_own'] = message['sender_id'] == request.user.id
     
-    return JsonResponse({'messages': messages_data})
+    # orjson writes the UUIDs and datetimes itself (RFC 3339, like isoformat())
+    return HttpResponse(orjson.dumps({'messages': messages_data}), content_type='application/json')
 
 
 @login_required
@@ -454,7 +509,7 @@ def delete_message(request, message_id):
         data = json.loads(request.body)
         delete_for_everyone = data.get('delete_for_everyone', False)
         
-        message = get_object_or_404(Message, id=message_id, sender=request.user)
+        message = get_object_or_404(Message.objects.headers(), id=message_id, sender=request.user)
         
         if delete_for_everyone:
             # Check if within 1 hour
@@ -463,12 +518,13 @@ def delete_message(request, message_id):
             
             message.deleted_for_everyone = True
             message.content = "This message was deleted"
-            message.save()
+            message.save(update_fields=['deleted_for_everyone', 'content'])
+            ChatParticipant.invalidate_chat_lists(ChatParticipant.participant_ids(message.chat_id))
         else:
-            # Delete for self only
-            DeletedMessage.objects.get_or_create(
-                message=message,
-                user=request.user
+            # Delete for self only; repeats are absorbed by the unique key
+            DeletedMessage.objects.bulk_create(
+                [DeletedMessage(message=message, user=request.user)],
+                ignore_conflicts=True,
             )
         
         return JsonResponse({'success': True})
@@ -483,30 +539,25 @@ def react_to_message(request, message_id):
         data = json.loads(request.body)
         emoji = data.get('emoji')
         
-        message = get_object_or_404(Message, id=message_id)
-        
-        # Check if already reacted
-        existing_reaction = MessageReaction.objects.filter(
-            message=message,
-            user=request.user
-        ).first()
-        
-        if existing_reaction:
-            if existing_reaction.emoji == emoji:
-                # Remove reaction
-                existing_reaction.delete()
-                return JsonResponse({'success': True, 'action': 'removed'})
-            else:
-                # Update reaction
-                existing_reaction.emoji = emoji
-                existing_reaction.save()
-                return JsonResponse({'success': True, 'action': 'updated'})
+        message = get_object_or_404(Message.objects.headers(), id=message_id)
+        
+        # Check if already reacted; only the emoji is needed, then one write
+        reactions = MessageReaction.objects.filter(message=message, user=request.user)
+        existing_emoji = reactions.values_list('emoji', flat=True).first()
+        
+        if existing_emoji == emoji:
+            # Remove reaction
+            reactions.delete()
+            return JsonResponse({'success': True, 'action': 'removed'})
+        elif existing_emoji is not None:
+            # Update reaction
+            reactions.update(emoji=emoji)
+            return JsonResponse({'success': True, 'action': 'updated'})
         else:
-            # Add new reaction
-            MessageReaction.objects.create(
-                message=message,
-                user=request.user,
-                emoji=emoji
+            # Add new reaction; a concurrent duplicate is dropped by the unique key
+            MessageReaction.objects.bulk_create(
+                [MessageReaction(message=message, user=request.user, emoji=emoji)],
+                ignore_conflicts=True,
             )
             return JsonResponse({'success': True, 'action': 'added'})
     
@@ -517,11 +568,18 @@ def react_to_message(request, message_id):
 def star_message(request, message_id):
     """Star/unstar a message"""
     if request.method == 'POST':
-        message = get_object_or_404(Message, id=message_id)
-        message.is_starred = not message.is_starred
-        message.save()
+        message = get_object_or_404(Message.objects.headers(), id=message_id)
+        
+        # Unstar if starred, otherwise star; one transaction and no SELECT either way
+        with transaction.atomic():
+            unstarred, _ = StarredMessage.objects.filter(user=request.user, message=message).delete()
+            if not unstarred:
+                StarredMessage.objects.bulk_create(
+                    [StarredMessage(user=request.user, message=message)],
+                    ignore_conflicts=True,
+                )
         
-        return JsonResponse({'success': True, 'is_starred': message.is_starred})
+        return JsonResponse({'success': True, 'is_starred': not unstarred})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
@@ -531,13 +589,21 @@ def star_message(request, message_id):
 @login_required
 def status_list_view(request):
     """View all statuses"""
-    # Get statuses from contacts
-    contacts = Contact.objects.filter(user=request.user).values_list('contact_user', flat=True)
-    
-    statuses = Status.objects.filter(
-        user__in=contacts,
-        expires_at__gt=timezone.now()
-    ).select_related('user').prefetch_related('views').order_by('-created_at')
+    # Get statuses from contacts; cached until a contact posts or the first one expires
+    cache_key = Status.feed_cache_key(request.user.id)
+    statuses = cache.get(cache_key)
+    if statuses is None:
+        # Compiled into the status query as IN (SELECT ...); the ids never leave Postgres
+        contacts = Subquery(Contact.objects.filter(user=request.user).values('contact_user'))
+        
+        now = timezone.now()
+        statuses = list(Status.objects.filter(
+            user__in=contacts,
+            expires_at__gt=now
+        ).select_related('user').prefetch_related('views').order_by('-created_at'))
+        
+        timeout = min([Status.FEED_CACHE_TIMEOUT] + [(s.expires_at - now).total_seconds() for s in statuses])
+        cache.set(cache_key, statuses, max(int(timeout), 1))
     
     # My statuses
     my_statuses = Status.objects.filter(
@@ -590,10 +656,7 @@ def view_status(request, status_id):
     status = get_object_or_404(Status, id=status_id, expires_at__gt=timezone.now())
     
     # Create view record
-    StatusView.objects.get_or_create(
-        status=status,
-        viewer=request.user
-    )
+    StatusView.record(status, request.user.id)
     
     context = {
         'status': status,
@@ -608,6 +671,7 @@ def delete_status(request, status_id):
     if request.method == 'POST':
         status = get_object_or_404(Status, id=status_id, user=request.user)
         status.delete()
+        Status.invalidate_feeds_showing(request.user.id)
         
         return JsonResponse({'success': True})
     
@@ -616,16 +680,22 @@ def delete_status(request, status_id):
 
 # ==================== Call Views ====================
 
+CALLS_PAGE_SIZE = 50
+
+
 @login_required
 def calls_view(request):
     """View call history"""
-    # Get all calls
+    # One page of calls at a time; each side is served by its (user, -started_at) index
     calls = Call.objects.filter(
         Q(caller=request.user) | Q(receiver=request.user)
-    ).select_related('caller', 'receiver').order_by('-started_at')
+    ).select_related('caller', 'receiver').order_by('-started_at', '-id')
+    
+    page = Paginator(calls, CALLS_PAGE_SIZE).get_page(request.GET.get('page'))
     
     context = {
-        'calls': calls,
+        'calls': page,
+        'page_obj': page,
     }
     
     return render(request, 'calls.html', context)
@@ -691,13 +761,12 @@ def update_call_status(request, call_id):
 def pin_chat(request, chat_id):
     """Pin/unpin a chat"""
     if request.method == 'POST':
-        chat = get_object_or_404(Chat, id=chat_id, participants=request.user)
-        participant = ChatParticipant.objects.get(chat=chat, user=request.user)
-        
-        participant.is_pinned = not participant.is_pinned
-        participant.save()
+        # Flipped in the database, so concurrent toggles can't lose an update
+        is_pinned = ChatParticipant.toggle(chat_id, request.user.id, 'is_pinned')
+        if is_pinned is None:
+            raise Http404
         
-        return JsonResponse({'success': True, 'is_pinned': participant.is_pinned})
+        return JsonResponse({'success': True, 'is_pinned': is_pinned})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
@@ -706,13 +775,12 @@ def pin_chat(request, chat_id):
 def mute_chat(request, chat_id):
     """Mute/unmute a chat"""
     if request.method == 'POST':
-        chat = get_object_or_404(Chat, id=chat_id, participants=request.user)
-        participant = ChatParticipant.objects.get(chat=chat, user=request.user)
+        # Flipped in the database, so concurrent toggles can't lose an update
+        is_muted = ChatParticipant.toggle(chat_id, request.user.id, 'is_muted')
+        if is_muted is None:
+            raise Http404
         
-        participant.is_muted = not participant.is_muted
-        participant.save()
-        
-        return JsonResponse({'success': True, 'is_muted': participant.is_muted})
+        return JsonResponse({'success': True, 'is_muted': is_muted})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
@@ -721,13 +789,12 @@ def mute_chat(request, chat_id):
 def archive_chat(request, chat_id):
     """Archive/unarchive a chat"""
     if request.method == 'POST':
-        chat = get_object_or_404(Chat, id=chat_id, participants=request.user)
-        participant = ChatParticipant.objects.get(chat=chat, user=request.user)
-        
-        participant.is_archived = not participant.is_archived
-        participant.save()
+        # Flipped in the database, so concurrent toggles can't lose an update
+        is_archived = ChatParticipant.toggle(chat_id, request.user.id, 'is_archived')
+        if is_archived is None:
+            raise Http404
         
-        return JsonResponse({'success': True, 'is_archived': participant.is_archived})
+        return JsonResponse({'success': True, 'is_archived': is_archived})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
@@ -808,7 +875,7 @@ def notifications_view(request):
     """Get notifications via AJAX"""
     notifications = Notification.objects.filter(
         user=request.user
-    ).order_by('-created_at')[:50]
+    ).only('id', 'notification_type', 'title', 'body', 'is_read', 'created_at').order_by('-created_at')[:50]
     
     notifications_data = []
     for notif in notifications:
@@ -824,13 +891,29 @@ def notifications_view(request):
     return JsonResponse({'notifications': notifications_data})
 
 
+@login_required
+def unread_counts(request):
+    """Badge counts via AJAX"""
+    # The cached chat list is only its first page, so per-chat counts come from the membership rows
+    chat_unread = ChatParticipant.objects.filter(user=request.user, unread_count__gt=0).values_list(
+        'chat_id', 'unread_count'
+    )
+    
+    return JsonResponse({
+        'notifications': Notification.unread_count(request.user.id),
+        'chats': {str(chat_id): count for chat_id, count in chat_unread},
+    })
+
+
 @login_required
 def mark_notification_read(request, notification_id):
     """Mark notification as read"""
     if request.method == 'POST':
         notification = get_object_or_404(Notification, id=notification_id, user=request.user)
-        notification.is_read = True
-        notification.save()
+        if not notification.is_read:
+            notification.is_read = True
+            notification.save(update_fields=['is_read'])
+            Notification.adjust_unread([request.user.id], -1)
         
         return JsonResponse({'success': True})
     